@@ -0,0 +1,27 @@
+"""Benchmarks for django_date_extensions.
+
+Run one from the top of the repository with e.g.
+``python -m benchmarks.parsing``, or the suite of them that can be compared
+between runs with ``python -m benchmarks``; see benchmarks.suite.
+"""
+import os
+import timeit
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'example.settings')
+    import django
+    django.setup()
+
+
+def setup_db():
+    """Set up Django with an in-memory database holding the test models."""
+    setup()
+    from django.db import connection
+    from django_date_extensions import tests  # noqa: F401
+    connection.creation.create_test_db(verbosity=0)
+
+
+def best_of(func, number, repeat=5):
+    """The best time taken for one call of func, in microseconds."""
+    return min(timeit.repeat(func, number=number, repeat=repeat)) / number * 1e6
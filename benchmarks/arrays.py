@@ -0,0 +1,59 @@
+"""Memory use and the time of common column operations for an
+ApproximateDateArray against a list of ApproximateDates."""
+import random
+import tracemalloc
+from collections import Counter
+
+from . import best_of, setup
+
+
+def random_values(cls, count=100000):
+    rand = random.Random(1)
+    values = []
+    for i in range(count - 2):
+        month = rand.randint(0, 12)
+        values.append(cls(rand.randint(1800, 2100), month, rand.randint(1, 28) if month else 0))
+    return values + [cls(future=True), cls(past=True)]
+
+
+def bytes_used(func):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = func()
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del value
+    return used
+
+
+def main():
+    setup()
+    from django_date_extensions import arrays
+    from django_date_extensions.arrays import ApproximateDateArray
+    from django_date_extensions.fields import ApproximateDate
+
+    values = random_values(ApproximateDate)
+    cutoff = ApproximateDate(1950, 6)
+    backends = [('array', False)] + ([('numpy', True)] if arrays.numpy is not None else [])
+
+    print('100000 values    %10s' % 'list' + ''.join('%10s' % name for name, _ in backends))
+    print('bytes each       %10.1f' % (bytes_used(lambda: random_values(ApproximateDate)) / 100000.0) + ''.join(
+        '%10.1f' % (bytes_used(lambda: ApproximateDateArray(values, use_numpy=use_numpy)) / 100000.0)
+        for _, use_numpy in backends))
+
+    columns = [ApproximateDateArray(values, use_numpy=use_numpy) for _, use_numpy in backends]
+    for name, on_list, on_array in (
+        ('min/max', lambda: (min(values), max(values)), lambda a: (a.min(), a.max())),
+        ('sort', lambda: sorted(values), lambda a: a.sorted()),
+        ('filter < date', lambda: [v for v in values if v < cutoff], lambda a: a[a < cutoff]),
+        ('day precision', lambda: [v for v in values if v.precision == 'day'],
+         lambda a: a[a.precision_mask('day')]),
+        ('year counts', lambda: Counter(v.year for v in values if not (v.past or v.future)),
+         lambda a: a.year_counts()),
+    ):
+        print('%-16s %8.1fms' % (name, best_of(on_list, 1, 3) / 1000) + ''.join(
+            '%8.1fms' % (best_of(lambda: on_array(column), 1, 3) / 1000) for column in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""Throughput of parse_many() from one worker process up to one per CPU,
+against cleaning each value in a loop."""
+import os
+import random
+import sys
+import timeit
+
+from . import setup
+
+
+def inputs(count):
+    rand = random.Random(1)
+    months = ('Jan', 'February', 'Mar', 'April', 'Oct', 'December')
+    values = []
+    for i in range(count):
+        year = rand.randint(1800, 2020)
+        values.append(rand.choice((
+            '%d' % year,
+            '%s %d' % (rand.choice(months), year),
+            '%dth %s %d' % (rand.randint(4, 20), rand.choice(months), year),
+            '%d-%02d-%02d' % (year, rand.randint(1, 12), rand.randint(1, 28)),
+            'c. %d' % year,
+        )))
+    return values
+
+
+def rate(func, count):
+    start = timeit.default_timer()
+    func()
+    return count / (timeit.default_timer() - start)
+
+
+def main(count=200000):
+    setup()
+    from django_date_extensions.batch import parse_many
+    from django_date_extensions.fields import ApproximateDateFormField
+
+    values = inputs(count)
+    field = ApproximateDateFormField(required=False)
+
+    def loop():
+        for value in values:
+            try:
+                field.clean(value)
+            except Exception:
+                pass
+
+    print('%d values, %d CPUs' % (count, os.cpu_count()))
+    print('clean() loop       %8.0f values/s' % rate(loop, count))
+    workers = int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count()
+    for n in range(1, max(workers, 1) + 1):
+        print('parse_many(%2d)     %8.0f values/s' % (n, rate(lambda: parse_many(values, workers=n), count)))
+
+
+if __name__ == '__main__':
+    main()
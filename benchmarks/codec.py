@@ -0,0 +1,33 @@
+"""Size and cache round-trip time of ApproximateDates: pickled as they used
+to be, pickled now, and packed with codec.pack()."""
+import pickle
+
+from . import best_of, setup
+from .values import LegacyApproximateDate, random_dates
+
+
+def main(count=10000):
+    setup()
+    from django.core.cache import caches
+    from django_date_extensions import codec
+    from django_date_extensions.fields import ApproximateDate
+
+    legacy = random_dates(LegacyApproximateDate, count)
+    dates = random_dates(ApproximateDate, count)
+    cache = caches['default']
+
+    def round_trip(value, decode=lambda value: value):
+        cache.set('benchmark', value)
+        return decode(cache.get('benchmark'))
+
+    print('%d values          bytes   cache set+get' % count)
+    for name, size, func in (
+        ('legacy pickle', len(pickle.dumps(legacy, pickle.HIGHEST_PROTOCOL)), lambda: round_trip(legacy)),
+        ('pickle', len(pickle.dumps(dates, pickle.HIGHEST_PROTOCOL)), lambda: round_trip(dates)),
+        ('codec.pack', len(codec.pack(dates)), lambda: round_trip(codec.pack(dates), codec.unpack)),
+    ):
+        print('%-16s %9d %11.2fms' % (name, size, best_of(func, 10) / 1000))
+
+
+if __name__ == '__main__':
+    main()
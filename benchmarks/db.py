@@ -0,0 +1,67 @@
+"""Reading ApproximateDateField values back from the database: trusted
+decoding against strict validation and the decoding as it used to be."""
+import random
+import re
+
+from . import best_of, setup_db
+from .values import LegacyApproximateDate
+
+ansi_date_re = re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$')
+
+
+def legacy_from_db_value(value):
+    if not value:
+        return ''
+    if value == 'future':
+        return LegacyApproximateDate(future=True)
+    if value == 'past':
+        return LegacyApproximateDate(past=True)
+    if not ansi_date_re.search(value):
+        raise ValueError('Enter a valid date in YYYY-MM-DD format.')
+    year, month, day = map(int, value.split('-'))
+    return LegacyApproximateDate(year, month, day)
+
+
+def stored_values(count):
+    rand = random.Random(1)
+    values = ['future', 'past']
+    while len(values) < count:
+        year = rand.randint(1900, 2020)
+        month = rand.randint(0, 12)
+        day = rand.randint(1, 28) if month and rand.random() < 0.5 else 0
+        values.append('%04d-%02d-%02d' % (year, month, day))
+    return values
+
+
+def main(rows=100000):
+    setup_db()
+    from django.db import connection
+    from django_date_extensions.fields import ApproximateDateField
+    from django_date_extensions.tests import ApproxDateModel
+
+    values = stored_values(rows)
+    strict = ApproximateDateField(strict=True)
+    trusted = ApproximateDateField()
+    print('decoding %d values:' % rows)
+    for name, func in (
+        ('legacy', lambda: [legacy_from_db_value(v) for v in values]),
+        ('strict', lambda: [strict.from_db_value(v) for v in values]),
+        ('trusted', lambda: [trusted.decode_trusted(v) for v in values]),
+        ('converter', lambda: list(map(trusted.get_db_converters(connection)[0], values))),
+    ):
+        print('  %-10s %6.0fms' % (name, best_of(func, 1, 3) / 1000))
+
+    ApproxDateModel.objects.bulk_create(ApproxDateModel(start=v) for v in values)
+    queryset = ApproxDateModel.objects.values_list('start', flat=True)
+    field = ApproxDateModel._meta.get_field('start')
+    print('loading %d rows:' % rows)
+    for strictness in (True, False):
+        field.strict = strictness
+        print('  %-10s %6.0fms' % (
+            'strict' if strictness else 'trusted', best_of(lambda: list(queryset.iterator()), 1, 3) / 1000,
+        ))
+    field.strict = False
+
+
+if __name__ == '__main__':
+    main()
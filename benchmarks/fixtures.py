@@ -0,0 +1,71 @@
+"""Dumping and loading a fixture of ApproximateDateField values, in each
+serialization format, against the field's serialization as it used to be."""
+import io
+
+from django.core import serializers
+
+from . import best_of, setup_db
+from .db import stored_values
+
+
+def legacy_value_to_string(self, obj):
+    return self.get_prep_value(self.value_from_object(obj))
+
+
+def legacy_to_python(self, value):
+    from django_date_extensions.fields import ApproximateDate, ansi_date_re
+    from django.core.exceptions import ValidationError
+    if isinstance(value, ApproximateDate) or not value:
+        return value or ''
+    if value in ('future', 'past'):
+        return ApproximateDate(**{value: True})
+    if not ansi_date_re.search(value):
+        raise ValidationError('Enter a valid date in YYYY-MM-DD format.')
+    return ApproximateDate(*map(int, value.split('-')))
+
+
+def round_trip(format, queryset):
+    out = io.StringIO()
+    serializers.serialize(format, queryset.iterator(), stream=out)
+    for obj in serializers.deserialize(format, out.getvalue()):
+        pass
+
+
+def main(rows=20000):
+    setup_db()
+    from django_date_extensions.fields import ApproximateDateField
+    from django_date_extensions.tests import ApproxDateModel
+
+    ApproxDateModel.objects.bulk_create(
+        ApproxDateModel(start=value, can_be_null=value) for value in stored_values(rows))
+    queryset = ApproxDateModel.objects.all()
+    formats = ['json', 'xml']
+    try:
+        import yaml  # noqa: F401
+        formats.append('yaml')
+    except ImportError:
+        pass
+
+    field = ApproxDateModel._meta.get_field('start')
+    objs = list(queryset)
+    strings = [field.value_to_string(obj) for obj in objs]
+    print('per value    value_to_string  to_python')
+    print('legacy       %12.2fus %9.2fus' % (
+        best_of(lambda: [legacy_value_to_string(field, obj) for obj in objs], 1) / rows,
+        best_of(lambda: [legacy_to_python(field, value) for value in strings], 1) / rows))
+    print('now          %12.2fus %9.2fus' % (
+        best_of(lambda: [field.value_to_string(obj) for obj in objs], 1) / rows,
+        best_of(lambda: [field.to_python(value) for value in strings], 1) / rows))
+
+    fast = ApproximateDateField.value_to_string, ApproximateDateField.to_python
+    print('%d rows, dump + load' % rows)
+    for format in formats:
+        ApproximateDateField.value_to_string, ApproximateDateField.to_python = legacy_value_to_string, legacy_to_python
+        legacy = best_of(lambda: round_trip(format, queryset), 1, 3) / 1000
+        ApproximateDateField.value_to_string, ApproximateDateField.to_python = fast
+        now = best_of(lambda: round_trip(format, queryset), 1, 3) / 1000
+        print('%-5s legacy %7.0fms  now %7.0fms' % (format, legacy, now))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""Validating a large formset of date forms, with and without
+ApproximateDateFormSetMixin."""
+import random
+import timeit
+
+from . import setup
+
+
+def post_data(count):
+    rand = random.Random(1)
+    months = ('Jan', 'February', 'Mar', 'April', 'Oct', 'December')
+    data = {'form-TOTAL_FORMS': str(count), 'form-INITIAL_FORMS': '0'}
+    for i in range(count):
+        month = rand.choice(months)
+        data['form-%d-start' % i] = rand.choice(('%d' % rand.randint(1990, 2010), '%s 2006' % month))
+        data['form-%d-due' % i] = '%dth %s' % (rand.randint(4, 20), month)
+    return data
+
+
+def main(count=5000):
+    setup()
+    from django import forms
+    from django_date_extensions.fields import ApproximateDateFormField, PrettyDateField
+    from django_date_extensions.forms import ApproximateDateFormSetMixin
+
+    class EventForm(forms.Form):
+        start = ApproximateDateFormField()
+        due = PrettyDateField(future=True)
+
+    class BatchedFormSet(ApproximateDateFormSetMixin, forms.BaseFormSet):
+        pass
+
+    data = post_data(count)
+    plain = forms.formset_factory(EventForm, max_num=count, absolute_max=count)
+    batched = forms.formset_factory(EventForm, formset=BatchedFormSet, max_num=count, absolute_max=count)
+
+    print('%d forms' % count)
+    for name, formset in (('formset', plain), ('with mixin', batched)):
+        seconds = min(timeit.repeat(lambda: formset(data).is_valid(), number=1, repeat=3))
+        print('%-12s %8.1f ms' % (name, seconds * 1000))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""Encoding ApproximateDateField values for storage, alone and as part of
+bulk_create() and bulk_update(), against the encoding as it used to be."""
+import datetime
+import random
+
+from django.utils import dateformat
+
+from . import best_of, setup_db
+
+
+def legacy_get_prep_value(value):
+    from django_date_extensions.fields import ApproximateDate, ansi_date_re
+    if not value:
+        return ''
+    if isinstance(value, ApproximateDate):
+        if value.future or value.past:
+            return str(value)
+        return "{year:04d}-{month:02d}-{day:02d}".format(year=value.year, month=value.month, day=value.day)
+    if isinstance(value, datetime.date):
+        return dateformat.format(value, "Y-m-d")
+    if value == 'future':
+        return 'future'
+    if value == 'past':
+        return 'past'
+    if not ansi_date_re.search(value):
+        raise ValueError('Enter a valid date in YYYY-MM-DD format.')
+    return value
+
+
+def column(count):
+    from django_date_extensions.fields import ApproximateDate
+    rand = random.Random(1)
+    values = []
+    for i in range(count):
+        choice = rand.random()
+        if choice < 0.5:
+            values.append(ApproximateDate(rand.randint(1900, 2020), rand.randint(0, 12)))
+        elif choice < 0.9:
+            values.append(datetime.date(rand.randint(1900, 2020), rand.randint(1, 12), rand.randint(1, 28)))
+        else:
+            values.append(rand.choice(('future', 'past', '')))
+    return values
+
+
+def main(rows=100000):
+    setup_db()
+    from django_date_extensions.tests import ApproxDateModel
+
+    field = ApproxDateModel._meta.get_field('start')
+    values = column(rows)
+    print('encoding %d values:' % rows)
+    for name, func in (
+        ('legacy', lambda: [legacy_get_prep_value(v) for v in values]),
+        ('get_prep_value', lambda: [field.get_prep_value(v) for v in values]),
+        ('get_prep_values', lambda: field.get_prep_values(values)),
+    ):
+        print('  %-16s %6.0fms' % (name, best_of(func, 1, 3) / 1000))
+
+    def bulk_create():
+        ApproxDateModel.objects.all().delete()
+        ApproxDateModel.objects.bulk_create((ApproxDateModel(start=v) for v in values), batch_size=1000)
+
+    def bulk_update():
+        ApproxDateModel.objects.bulk_update(objs, ['start'], batch_size=1000)
+
+    for name, prep in (('legacy', legacy_get_prep_value), ('current', None)):
+        if prep:
+            field.get_prep_value = prep
+        create_time = best_of(bulk_create, 1, 3)
+        # bulk_update() is much slower per row, so do a fifth of them.
+        objs = list(ApproxDateModel.objects.all()[:rows // 5])
+        for obj, value in zip(objs, reversed(values)):
+            obj.start = value
+        print('%-8s bulk_create %6.0fms  bulk_update %6.0fms' % (
+            name, create_time / 1000, best_of(bulk_update, 1, 1) / 1000,
+        ))
+        if prep:
+            del field.get_prep_value
+
+
+if __name__ == '__main__':
+    main()
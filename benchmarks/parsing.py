@@ -0,0 +1,62 @@
+"""Form input parsing: the compiled parser against a time.strptime loop,
+from one thread and from several at once."""
+import re
+import threading
+import time
+import timeit
+
+from . import best_of, setup
+
+INPUTS = ('2006', 'Oct 2006', '25 October 2006', '2006-10-25', '25/10/06')
+
+
+def strptime_clean(value):
+    """What ApproximateDateFormField.clean used to do."""
+    from django_date_extensions import settings
+    from django_date_extensions.fields import ApproximateDate
+    value = re.sub(r'(?<=\d)(st|nd|rd|th)', '', value.strip())
+    for formats, precision in ((settings.DATE_INPUT_FORMATS, 3),
+                               (settings.MONTH_INPUT_FORMATS, 2),
+                               (settings.YEAR_INPUT_FORMATS, 1)):
+        for date_format in formats:
+            try:
+                t = time.strptime(value, date_format)
+                return ApproximateDate(*(t[:precision] + (0,) * (3 - precision)))
+            except ValueError:
+                continue
+
+
+def threaded_rate(func, threads, calls=2000):
+    """Calls per second of func over INPUTS, split across threads."""
+    def work():
+        for i in range(calls):
+            func(INPUTS[i % len(INPUTS)])
+
+    workers = [threading.Thread(target=work) for n in range(threads)]
+    start = timeit.default_timer()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return threads * calls / (timeit.default_timer() - start)
+
+
+def main():
+    setup()
+    from django_date_extensions.fields import ApproximateDateFormField
+    clean = ApproximateDateFormField().clean
+
+    for value in INPUTS:
+        print('%-16s strptime %8.1fus  compiled %8.1fus' % (
+            value,
+            best_of(lambda: strptime_clean(value), 1000),
+            best_of(lambda: clean(value), 1000),
+        ))
+    for threads in (1, 2, 4, 8):
+        print('%d threads: strptime %8.0f/s  compiled %8.0f/s' % (
+            threads, threaded_rate(strptime_clean, threads), threaded_rate(clean, threads),
+        ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""Rendering ApproximateDates with str(): dateformat.format() against the
+compiled formatters."""
+import random
+
+from . import best_of, setup
+
+LANGUAGES = ('en', 'ru', 'fr')
+
+
+def main(count=10000):
+    setup()
+    from django.utils import dateformat, translation
+    from django_date_extensions import settings
+    from django_date_extensions.fields import ApproximateDate
+
+    rand = random.Random(1)
+    # A page of dates usually has many repeats, so draw from a smaller pool.
+    pool = [ApproximateDate(rand.randint(1990, 2020), rand.randint(1, 12), rand.randint(0, 28))
+            for i in range(count // 20)]
+    dates = [rand.choice(pool) for i in range(count)]
+
+    def legacy():
+        for value in dates:
+            if value.day:
+                dateformat.format(value, settings.OUTPUT_FORMAT_DAY_MONTH_YEAR)
+            else:
+                dateformat.format(value, settings.OUTPUT_FORMAT_MONTH_YEAR)
+
+    def current():
+        for value in dates:
+            str(value)
+
+    for language in LANGUAGES:
+        with translation.override(language):
+            legacy_time = best_of(legacy, 1, 3)
+            compiled_time = best_of(current, 1, 3)
+        print('%s: rendering %d: dateformat %5.0fms  compiled %5.0fms' % (
+            language, count, legacy_time / 1000, compiled_time / 1000,
+        ))
+
+
+if __name__ == '__main__':
+    main()
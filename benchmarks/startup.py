@@ -0,0 +1,49 @@
+"""Start-up cost: the time python -X importtime reports for importing
+django_date_extensions.core on its own, against setting up Django and
+importing django_date_extensions.fields."""
+import os
+import re
+import subprocess
+import sys
+
+STATEMENTS = (
+    ('core', 'import django_date_extensions.core', False),
+    ('django.setup + fields', 'import django; django.setup(); import django_date_extensions.fields', True),
+)
+
+_line_re = re.compile(r'^import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)')
+
+
+def import_time(statement, with_django, repeat=5):
+    """The best total of the top level imports' cumulative times, in
+       microseconds, and the number of modules imported."""
+    env = dict(os.environ)
+    env.pop('DJANGO_SETTINGS_MODULE', None)
+    if with_django:
+        env['DJANGO_SETTINGS_MODULE'] = 'example.settings'
+    best = None
+    for i in range(repeat):
+        output = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', statement], env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, check=True,
+        ).stderr
+        total = modules = 0
+        for line in output.splitlines():
+            match = _line_re.match(line)
+            if match:
+                modules += 1
+                if not match.group(3).replace(' ', '', 1):
+                    total += int(match.group(2))
+        if best is None or total < best[0]:
+            best = total, modules
+    return best
+
+
+def main():
+    for name, statement, with_django in STATEMENTS:
+        total, modules = import_time(statement, with_django)
+        print('%-24s %7.1fms  %4d modules' % (name, total / 1000.0, modules))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Indexed ApproximateDateField (strings) against ApproximateDateIntegerField
+(sort keys) on SQLite: space taken and query times."""
+from . import best_of, setup_db
+from .db import stored_values
+
+
+def make_models():
+    from django.db import models
+    from django_date_extensions.fields import ApproximateDateField, ApproximateDateIntegerField
+
+    class CharStorage(models.Model):
+        start = ApproximateDateField(db_index=True)
+
+        class Meta:
+            app_label = 'django_date_extensions'
+
+    class IntegerStorage(models.Model):
+        start = ApproximateDateIntegerField(db_index=True)
+
+        class Meta:
+            app_label = 'django_date_extensions'
+
+    return CharStorage, IntegerStorage
+
+
+def page_count(cursor):
+    cursor.execute('PRAGMA page_count')
+    return cursor.fetchone()[0]
+
+
+def main(rows=100000):
+    setup_db()
+    from django.db import connection
+    from django_date_extensions.fields import ApproximateDate
+
+    values = stored_values(rows)
+    cursor = connection.cursor()
+    cursor.execute('PRAGMA page_size')
+    page_size = cursor.fetchone()[0]
+    low, high = ApproximateDate(1950), ApproximateDate(1960, 6)
+    for model in make_models():
+        with connection.schema_editor() as editor:
+            editor.create_model(model)
+        before = page_count(cursor)
+        model.objects.bulk_create((model(start=v) for v in values), batch_size=1000)
+        size = (page_count(cursor) - before) * page_size
+        queryset = model.objects.all()
+        print('%-14s %5.1f MB  range count %6.2fms  first by date %6.2fms  load 1000 sorted %6.1fms' % (
+            model.__name__, size / 1e6,
+            best_of(lambda: queryset.filter(start__gte=low, start__lt=high).count(), 10) / 1000,
+            best_of(lambda: queryset.order_by('start').first(), 10) / 1000,
+            best_of(lambda: list(queryset.order_by('start')[5000:6000]), 10) / 1000,
+        ))
+
+
+if __name__ == '__main__':
+    main()
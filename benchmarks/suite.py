@@ -0,0 +1,309 @@
+"""The benchmark suite, run with ``python -m benchmarks``.
+
+Each benchmark times one hot path over a fixed, seeded set of values, in an
+in-memory SQLite database set up from example.settings, and reports the best
+time per item of a few runs; some also report the peak memory per item
+traced while running. Results can be written out as JSON, and compared with
+a previous run's, exiting with status 1 if anything has got slower (or
+bigger) by more than the tolerance.
+
+    python -m benchmarks --json baseline.json
+    python -m benchmarks --baseline baseline.json
+
+--scale shrinks or grows the number of values, e.g. --scale 0.05 for a quick
+run; at 1 the database and sorting benchmarks use a million rows. Timings
+are per item, so runs at different scales can be compared, if roughly.
+"""
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import timeit
+import tracemalloc
+
+from . import setup_db
+from .batch import inputs
+from .db import stored_values
+
+BENCHMARKS = []
+
+LANGUAGES = ('en', 'ru', 'fr')
+
+
+def benchmark(name, memory=False, repeat=3):
+    """Register a benchmark: a function taking the scale and returning
+       (run, items), or (run, items, before) where before() is called,
+       untimed, ahead of each run."""
+    def register(func):
+        BENCHMARKS.append((name, func, memory, repeat))
+        return func
+    return register
+
+
+def _count(base, scale):
+    return max(int(base * scale), 10)
+
+
+def _dates(count):
+    from django_date_extensions.fields import decode
+    return [decode(value) for value in stored_values(count)]
+
+
+@benchmark('clean')
+def clean(scale):
+    """ApproximateDateFormField.clean() over a mix of inputs, some invalid."""
+    from django.core.exceptions import ValidationError
+    from django_date_extensions.fields import ApproximateDateFormField
+    field = ApproximateDateFormField(required=False)
+    values = inputs(_count(50000, scale))
+
+    def run():
+        for value in values:
+            try:
+                field.clean(value)
+            except ValidationError:
+                pass
+    return run, len(values)
+
+
+@benchmark('clean_pretty')
+def clean_pretty(scale):
+    """PrettyDateField(future=True).clean() over dates with and without
+       years."""
+    import datetime
+    from django_date_extensions.fields import PrettyDateField
+    field = PrettyDateField(future=True, clock=lambda: datetime.date(2021, 6, 1))
+    rand = random.Random(1)
+    months = ('Jan', 'February', 'Mar', 'April', 'Oct', 'December')
+    values = []
+    for i in range(_count(50000, scale)):
+        day, month = rand.randint(4, 20), rand.choice(months)
+        values.append(rand.choice((
+            '%dth %s' % (day, month),
+            '%dth %s 2006' % (day, month),
+            '%d/%02d/2006' % (day, rand.randint(1, 12)),
+        )))
+
+    def run():
+        for value in values:
+            field.clean(value)
+    return run, len(values)
+
+
+@benchmark('get_prep_value')
+def get_prep_value(scale):
+    from django_date_extensions.fields import ApproximateDateField
+    prep_value = ApproximateDateField().get_prep_value
+    dates = _dates(_count(200000, scale))
+
+    def run():
+        for value in dates:
+            prep_value(value)
+    return run, len(dates)
+
+
+@benchmark('from_db_value')
+def from_db_value(scale):
+    """The converter a query uses to decode each value read."""
+    from django.db import connection
+    from django_date_extensions.fields import ApproximateDateField
+    values = stored_values(_count(200000, scale))
+    field = ApproximateDateField()
+
+    def run():
+        convert = field.get_db_converters(connection)[0]
+        for value in values:
+            convert(value)
+    return run, len(values)
+
+
+@benchmark('save', memory=True, repeat=2)
+def save(scale):
+    """bulk_create() of rows with an ApproximateDateField."""
+    from django_date_extensions.tests import ApproxDateModel
+    dates = _dates(_count(1000000, scale))
+
+    def before():
+        ApproxDateModel.objects.all().delete()
+
+    def run():
+        ApproxDateModel.objects.bulk_create((ApproxDateModel(start=value) for value in dates), batch_size=5000)
+    return run, len(dates), before
+
+
+@benchmark('load', memory=True)
+def load(scale):
+    """Reading back the values of an ApproximateDateField from every row."""
+    from django_date_extensions.tests import ApproxDateModel
+    count = _count(1000000, scale)
+    if ApproxDateModel.objects.count() != count:
+        ApproxDateModel.objects.all().delete()
+        ApproxDateModel.objects.bulk_create((ApproxDateModel(start=value) for value in _dates(count)),
+                                            batch_size=5000)
+    queryset = ApproxDateModel.objects.values_list('start', flat=True)
+
+    def run():
+        for value in queryset.iterator(chunk_size=5000):
+            pass
+    return run, count
+
+
+@benchmark('sort', memory=True)
+def sort(scale):
+    dates = _dates(_count(1000000, scale))
+    random.Random(1).shuffle(dates)
+
+    def run():
+        sorted(dates)
+    return run, len(dates)
+
+
+@benchmark('compare')
+def compare(scale):
+    """<, == and overlaps() between neighbouring values."""
+    dates = _dates(_count(200000, scale))
+    pairs = list(zip(dates, dates[1:]))
+
+    def run():
+        for a, b in pairs:
+            a < b
+            a == b
+            a.overlaps(b)
+    return run, len(pairs)
+
+
+def _render(language):
+    def render(scale):
+        """str() under the language."""
+        from django.utils import translation
+        from django_date_extensions.fields import ApproximateDate
+        rand = random.Random(1)
+        count = _count(50000, scale)
+        # A page of dates usually has many repeats, so draw from a smaller pool.
+        pool = [ApproximateDate(rand.randint(1990, 2020), rand.randint(1, 12), rand.randint(0, 28))
+                for i in range(max(count // 20, 1))]
+        dates = [rand.choice(pool) for i in range(count)]
+
+        def run():
+            with translation.override(language):
+                for value in dates:
+                    str(value)
+        return run, count
+    return render
+
+
+for _language in LANGUAGES:
+    benchmark('render_%s' % _language)(_render(_language))
+
+
+def run_benchmark(func, scale, memory, repeat):
+    prepared = func(scale)
+    run, items = prepared[:2]
+    before = prepared[2] if len(prepared) > 2 else None
+    times = []
+    for i in range(repeat):
+        if before:
+            before()
+        gc.collect()
+        start = timeit.default_timer()
+        run()
+        times.append(timeit.default_timer() - start)
+    result = {'items': items, 'us_per_item': min(times) / items * 1e6}
+    if memory:
+        if before:
+            before()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            run()
+            result['peak_bytes_per_item'] = tracemalloc.get_traced_memory()[1] / float(items)
+        finally:
+            tracemalloc.stop()
+    return result
+
+
+def environment(scale):
+    import django
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'django': django.get_version(),
+        'platform': platform.platform(),
+        'scale': scale,
+    }
+
+
+def compare_results(results, baseline, tolerance):
+    """Lines describing each figure against the baseline's, and the names
+       of those that have regressed by more than tolerance."""
+    lines = []
+    regressions = []
+    for name, figures in sorted(results.items()):
+        old = baseline.get(name)
+        if old is None:
+            lines.append('%-16s new' % name)
+            continue
+        for key in ('us_per_item', 'peak_bytes_per_item'):
+            if key not in figures or not old.get(key):
+                continue
+            change = figures[key] / old[key] - 1
+            regressed = change > tolerance
+            if regressed:
+                regressions.append('%s %s' % (name, key))
+            lines.append('%-16s %-20s %12.3f -> %12.3f  %+6.1f%%%s' % (
+                name, key, old[key], figures[key], change * 100, '  REGRESSION' if regressed else ''))
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Runs the benchmark suite.')
+    parser.add_argument('names', nargs='*', help='Only run these benchmarks.')
+    parser.add_argument('--scale', type=float, default=1.0, help='Multiply the number of values by this.')
+    parser.add_argument('--json', metavar='PATH', help='Write the results to this file as JSON.')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare with the results in this file.')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='How much slower or bigger, as a fraction, counts as a regression.')
+    parser.add_argument('--list', action='store_true', help='List the benchmarks and exit.')
+    args = parser.parse_args(argv)
+
+    known = [name for name, func, memory, repeat in BENCHMARKS]
+    if args.list:
+        print('\n'.join(known))
+        return 0
+    unknown = set(args.names) - set(known)
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(sorted(unknown)))
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    setup_db()
+    results = {}
+    for name, func, memory, repeat in BENCHMARKS:
+        if args.names and name not in args.names:
+            continue
+        results[name] = figures = run_benchmark(func, args.scale, memory, repeat)
+        print('%-16s %10.3f us/item%s' % (name, figures['us_per_item'], (
+            '  %8.1f bytes/item peak' % figures['peak_bytes_per_item'] if memory else '')))
+        sys.stdout.flush()
+
+    output = {'environment': environment(args.scale), 'results': results}
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(output, f, indent=2, sort_keys=True)
+
+    if baseline is None:
+        return 0
+    if baseline['environment'].get('scale') != args.scale:
+        print('Warning: the baseline was run at scale %s' % baseline['environment'].get('scale'))
+    lines, regressions = compare_results(results, baseline['results'], args.tolerance)
+    print('\nAgainst %s:' % args.baseline)
+    print('\n'.join(lines))
+    if regressions:
+        print('\n%d REGRESSION(S) of more than %d%%: %s' % (
+            len(regressions), args.tolerance * 100, ', '.join(regressions)))
+        return 1
+    return 0
@@ -0,0 +1,100 @@
+"""ApproximateDate construction time, memory use and sorting, against the
+class as it was before it had __slots__ and a sort key."""
+import datetime
+import random
+import tracemalloc
+from functools import total_ordering
+
+from . import best_of, setup
+
+
+@total_ordering
+class LegacyApproximateDate(object):
+    def __init__(self, year=0, month=0, day=0, future=False, past=False):
+        if future and past:
+            raise ValueError("Can't be both future and past")
+        elif future or past:
+            if year or month or day:
+                raise ValueError("Future or past dates can have no year, month or day")
+        elif year and month and day:
+            datetime.date(year, month, day)
+        elif year and month:
+            datetime.date(year, month, 1)
+        elif year and day:
+            raise ValueError("You cannot specify just a year and a day")
+        elif year:
+            datetime.date(year, 1, 1)
+        else:
+            raise ValueError("You must specify a year")
+
+        self.future = future
+        self.past = past
+        self.year = year
+        self.month = month
+        self.day = day
+
+    def __eq__(self, other):
+        if isinstance(other, (datetime.date, datetime.datetime)):
+            return (self.year, self.month, self.day) ==\
+                   (other.year, other.month, other.day)
+
+        if not isinstance(other, LegacyApproximateDate):
+            return False
+
+        return (self.year, self.month, self.day, self.future, self.past) ==\
+               (other.year, other.month, other.day, other.future, other.past)
+
+    def __lt__(self, other):
+        if other is None:
+            return False
+
+        if isinstance(other, LegacyApproximateDate):
+            if self.future or other.future:
+                return not self.future
+            if self.past or other.past:
+                return not other.past
+
+        return (self.year, self.month, self.day) < (other.year, other.month, other.day)
+
+
+def bytes_each(func, count=100000):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    values = [func(1900 + i % 100, i % 12 + 1, i % 28 + 1) for i in range(count)]
+    used = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del values
+    # Less the list holding them.
+    return used / float(count) - 8
+
+
+def random_dates(cls, count=100000):
+    rand = random.Random(1)
+    dates = [cls(rand.randint(1800, 2100), rand.randint(0, 12), 0) for i in range(count - 2)]
+    return dates + [cls(future=True), cls(past=True)]
+
+
+def main():
+    setup()
+    from django_date_extensions.fields import ApproximateDate
+
+    for name, func in (
+        ('legacy', LegacyApproximateDate),
+        ('ApproximateDate', ApproximateDate),
+        ('ApproximateDate._make', ApproximateDate._make),
+    ):
+        print('%-22s %6.2fus  %5.0f bytes' % (
+            name, best_of(lambda: func(2006, 10, 25), 100000), bytes_each(func),
+        ))
+
+    legacy = random_dates(LegacyApproximateDate)
+    dates = random_dates(ApproximateDate)
+    print('sorting 100000: legacy %.0fms  compare %.0fms  sort_key %.0fms' % (
+        best_of(lambda: sorted(legacy), 1, 3) / 1000,
+        best_of(lambda: sorted(dates), 1, 3) / 1000,
+        best_of(lambda: sorted(dates, key=ApproximateDate.sort_key), 1, 3) / 1000,
+    ))
+
+
+if __name__ == '__main__':
+    main()
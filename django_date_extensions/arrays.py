@@ -0,0 +1,276 @@
+"""A compact column of ApproximateDates, for analysing many at once.
+
+An ApproximateDateArray holds each value as its integer sort key in one
+packed buffer: a NumPy array if NumPy is installed, otherwise a standard
+library array. Operations on the whole column then work on the integers
+without creating an ApproximateDate for each value; indexing a single
+value still gives an ApproximateDate.
+"""
+import bisect
+import datetime
+from array import array
+from collections import Counter
+from itertools import compress
+
+from django.db import models
+
+from .fields import FUTURE_SORT_KEY, PAST_SORT_KEY, ApproximateDate, ApproximateDateIntegerField
+from .functions import ApproximateDateOrder
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# The key for an empty value, which is None when indexed, compares false
+# with everything, and is left out of min(), max() and counts.
+MISSING_KEY = -1
+
+# Every key fits in a 32-bit integer.
+TYPECODE = 'i'
+
+
+def _key(value):
+    """The sort key of an ApproximateDate or date to compare keys with."""
+    if isinstance(value, ApproximateDate):
+        return value.sort_key()
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        return value.year * 10000 + value.month * 100 + value.day
+    raise TypeError('Expected an ApproximateDate or date, not %r' % (value,))
+
+
+class ApproximateDateArray(object):
+    """A sequence of ApproximateDates (or None for empty values), stored
+       as sort keys.
+
+       Comparing the array with an ApproximateDate or date gives a boolean
+       mask, which can index the array to pick out the matching values.
+       Masks are NumPy arrays if NumPy is used and lists otherwise. Each
+       value compares just as it would on its own, so past is before every
+       date, and so is future, which is only after them against other
+       ApproximateDates. Set use_numpy to False to use a standard library array even
+       if NumPy is installed."""
+
+    def __init__(self, values=(), use_numpy=None):
+        keys = [MISSING_KEY if value is None or value == '' else _key(value) for value in values]
+        self._keys = self._pack(keys, numpy is not None if use_numpy is None else use_numpy)
+
+    @staticmethod
+    def _pack(keys, use_numpy):
+        if use_numpy:
+            if numpy is None:
+                raise ImportError('NumPy is not installed')
+            # fromiter, unlike numpy.array(), takes generators as well.
+            return numpy.fromiter(keys, dtype=numpy.int32)
+        return array(TYPECODE, keys)
+
+    @classmethod
+    def from_keys(cls, keys, use_numpy=None):
+        """An array of the values with the given sort keys, and MISSING_KEY
+           for empty ones, e.g. from ApproximateDateIntegerField columns."""
+        self = cls.__new__(cls)
+        self._keys = cls._pack(keys, numpy is not None if use_numpy is None else use_numpy)
+        return self
+
+    @classmethod
+    def from_queryset(cls, queryset, field_name, use_numpy=None):
+        """An array of the values of an ApproximateDateField or
+           ApproximateDateIntegerField in a queryset, in its order. The
+           database works out the sort keys, so no ApproximateDates are
+           created on the way."""
+        field = queryset.model._meta.get_field(field_name)
+        if isinstance(field, ApproximateDateIntegerField):
+            key = models.ExpressionWrapper(models.F(field_name), output_field=models.IntegerField())
+        else:
+            key = ApproximateDateOrder(field_name)
+        keys = queryset.annotate(approximate_date_key=key).values_list('approximate_date_key', flat=True)
+        keys = keys.iterator()
+        return cls.from_keys((MISSING_KEY if k is None else k for k in keys), use_numpy)
+
+    @property
+    def keys(self):
+        """The underlying sort keys."""
+        return self._keys
+
+    @property
+    def uses_numpy(self):
+        return not isinstance(self._keys, array)
+
+    @property
+    def nbytes(self):
+        """The size of the sort key buffer in bytes."""
+        if self.uses_numpy:
+            return self._keys.nbytes
+        return self._keys.itemsize * len(self._keys)
+
+    def _new(self, keys):
+        other = type(self).__new__(type(self))
+        other._keys = keys
+        return other
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self._new(self._keys[index])
+        if isinstance(index, int) or (self.uses_numpy and numpy.isscalar(index)):
+            key = int(self._keys[index])
+            return None if key == MISSING_KEY else ApproximateDate._from_key(key)
+        # A boolean mask.
+        if self.uses_numpy:
+            return self._new(self._keys[numpy.asarray(index, dtype=bool)])
+        return self._new(array(TYPECODE, compress(self._keys, index)))
+
+    def __iter__(self):
+        from_key = ApproximateDate._from_key
+        for key in self._keys:
+            yield None if key == MISSING_KEY else from_key(int(key))
+
+    def __repr__(self):
+        return '%s(%r)' % (type(self).__name__, list(self))
+
+    def _operands(self, other):
+        """The keys to compare, and the key to compare them with. Against a
+           date, future counts as having no year, just as it does when an
+           ApproximateDate is compared with one."""
+        key = _key(other)
+        keys = self._keys
+        if not isinstance(other, ApproximateDate):
+            if self.uses_numpy:
+                keys = numpy.where(keys == FUTURE_SORT_KEY, PAST_SORT_KEY, keys)
+            else:
+                keys = [PAST_SORT_KEY if k == FUTURE_SORT_KEY else k for k in keys]
+        return keys, key
+
+    # Empty values have a key below every other, so only need leaving
+    # out explicitly where smaller keys would match.
+
+    def __eq__(self, other):
+        keys, key = self._operands(other)
+        if self.uses_numpy:
+            return keys == key
+        return [k == key for k in keys]
+
+    def __ne__(self, other):
+        keys, key = self._operands(other)
+        if self.uses_numpy:
+            return (keys != key) & (keys != MISSING_KEY)
+        return [MISSING_KEY != k != key for k in keys]
+
+    def __lt__(self, other):
+        keys, key = self._operands(other)
+        if self.uses_numpy:
+            return (keys < key) & (keys != MISSING_KEY)
+        return [MISSING_KEY < k < key for k in keys]
+
+    def __le__(self, other):
+        keys, key = self._operands(other)
+        if self.uses_numpy:
+            return (keys <= key) & (keys != MISSING_KEY)
+        return [MISSING_KEY < k <= key for k in keys]
+
+    def __gt__(self, other):
+        keys, key = self._operands(other)
+        if self.uses_numpy:
+            return keys > key
+        return [k > key for k in keys]
+
+    def __ge__(self, other):
+        keys, key = self._operands(other)
+        if self.uses_numpy:
+            return keys >= key
+        return [k >= key for k in keys]
+
+    __hash__ = None
+
+    def precision_mask(self, precision):
+        """A mask of the values with the given precision: 'day', 'month',
+           'year', 'past' or 'future', as ApproximateDate.precision."""
+        keys = self._keys
+        if self.uses_numpy:
+            if precision == 'past':
+                return keys == PAST_SORT_KEY
+            if precision == 'future':
+                return keys == FUTURE_SORT_KEY
+            dated = (keys > PAST_SORT_KEY) & (keys < FUTURE_SORT_KEY)
+            if precision == 'day':
+                return dated & (keys % 100 != 0)
+            if precision == 'month':
+                return dated & (keys % 100 == 0) & (keys % 10000 != 0)
+            if precision == 'year':
+                return dated & (keys % 10000 == 0)
+            raise KeyError(precision)
+        if precision == 'past':
+            return [k == PAST_SORT_KEY for k in keys]
+        if precision == 'future':
+            return [k == FUTURE_SORT_KEY for k in keys]
+        if precision == 'day':
+            return [PAST_SORT_KEY < k < FUTURE_SORT_KEY and k % 100 != 0 for k in keys]
+        if precision == 'month':
+            return [PAST_SORT_KEY < k < FUTURE_SORT_KEY and k % 100 == 0 and k % 10000 != 0 for k in keys]
+        if precision == 'year':
+            return [PAST_SORT_KEY < k < FUTURE_SORT_KEY and k % 10000 == 0 for k in keys]
+        raise KeyError(precision)
+
+    def sorted(self):
+        """A sorted copy, with any empty values first."""
+        if self.uses_numpy:
+            return self._new(numpy.sort(self._keys))
+        return self._new(array(TYPECODE, sorted(self._keys)))
+
+    def argsort(self):
+        """The indexes that would sort the array, stably."""
+        if self.uses_numpy:
+            return numpy.argsort(self._keys, kind='stable')
+        keys = self._keys
+        return sorted(range(len(keys)), key=keys.__getitem__)
+
+    def searchsorted(self, value, side='left'):
+        """Where value would go in this array, which must be sorted, to
+           keep it sorted, as numpy.searchsorted."""
+        key = _key(value)
+        if self.uses_numpy:
+            return int(numpy.searchsorted(self._keys, key, side=side))
+        if side == 'left':
+            return bisect.bisect_left(self._keys, key)
+        return bisect.bisect_right(self._keys, key)
+
+    def min(self):
+        """The earliest value, or None if there are none."""
+        keys = self._keys
+        if self.uses_numpy:
+            keys = keys[keys != MISSING_KEY]
+        elif MISSING_KEY in keys:
+            keys = [k for k in keys if k != MISSING_KEY]
+        return ApproximateDate._from_key(int(min(keys))) if len(keys) else None
+
+    def max(self):
+        """The latest value, or None if there are none."""
+        key = int(max(self._keys)) if len(self._keys) else MISSING_KEY
+        return None if key == MISSING_KEY else ApproximateDate._from_key(key)
+
+    def year_counts(self):
+        """A dict of how many values fall in each year. Past and future
+           are not counted."""
+        return self._counts(lambda keys: keys // 10000, False)
+
+    def month_counts(self):
+        """A dict of how many values fall in each (year, month). Values
+           with no month, past and future are not counted."""
+        counts = self._counts(lambda keys: keys // 100, True)
+        return dict((divmod(month, 100), count) for month, count in counts.items())
+
+    def _counts(self, bucket, need_month):
+        keys = self._keys
+        if self.uses_numpy:
+            dated = (keys > PAST_SORT_KEY) & (keys < FUTURE_SORT_KEY)
+            if need_month:
+                dated &= keys // 100 % 100 != 0
+            buckets, counts = numpy.unique(bucket(keys[dated]), return_counts=True)
+            return dict(zip(buckets.tolist(), counts.tolist()))
+        return dict(Counter(
+            bucket(k) for k in keys
+            if PAST_SORT_KEY < k < FUTURE_SORT_KEY and not (need_month and k // 100 % 100 == 0)))
@@ -0,0 +1,132 @@
+"""Parsing large numbers of free-text dates across several processes.
+
+parse_many() splits its input into chunks and cleans each chunk with
+ApproximateDateFormField in a process pool. Each worker sends back its
+results as a packed array of sort keys plus the error messages of any
+values that failed, which is far smaller and quicker to unpickle than the
+ApproximateDates themselves, and they are turned back into ApproximateDates
+in the calling process.
+
+Workers are started with the same DJANGO_SETTINGS_MODULE as the calling
+process, so input formats and other settings must come from there. Before
+Python 3.7, which added the pool's initializer they are set up with,
+everything is done in the calling process instead.
+"""
+import collections
+import os
+import sys
+from array import array
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+
+from .fields import ApproximateDate, ApproximateDateFormField
+
+if sys.version_info >= (3, 7):
+    from concurrent.futures import ProcessPoolExecutor
+else:
+    ProcessPoolExecutor = None
+
+# The key sent back for an empty value.
+EMPTY_KEY = -1
+
+# The key sent back for a value that failed, whose messages are sent
+# alongside.
+ERROR_KEY = -2
+
+CHUNK_SIZE = 10000
+
+
+def _parse_chunk(values):
+    """Clean values, returning (keys, errors): the packed sort keys and a
+       dict of the error messages of those that failed, by position."""
+    clean = ApproximateDateFormField(required=False).clean
+    keys = array('i')
+    errors = {}
+    for i, value in enumerate(values):
+        try:
+            result = clean(value)
+        except ValidationError as e:
+            keys.append(ERROR_KEY)
+            errors[i] = e.messages
+        else:
+            keys.append(EMPTY_KEY if result is None else result.sort_key())
+    return keys.tobytes() if hasattr(keys, 'tobytes') else keys.tostring(), errors
+
+
+def _decode_chunk(encoded):
+    data, errors = encoded
+    keys = array('i')
+    if hasattr(keys, 'frombytes'):
+        keys.frombytes(data)
+    else:
+        keys.fromstring(data)
+    from_key = ApproximateDate._from_key
+    results = []
+    for i, key in enumerate(keys):
+        if key == EMPTY_KEY:
+            results.append(None)
+        elif key == ERROR_KEY:
+            results.append(ValidationError(errors[i]))
+        else:
+            results.append(from_key(key))
+    return results
+
+
+def _setup_worker(settings_module):
+    """Set up Django in a worker that was not forked from a process that
+       had already done so."""
+    import django
+    from django.apps import apps
+    if not apps.ready:
+        if settings_module:
+            os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+        django.setup()
+
+
+def _chunks(values, size):
+    values = iter(values)
+    while True:
+        chunk = list(islice(values, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_many(values, workers=None, chunk_size=CHUNK_SIZE):
+    """Clean each of values as ApproximateDateFormField(required=False)
+       would, in order, using a pool of workers processes (by default one
+       per CPU). Each result is an ApproximateDate, None for an empty
+       value, or the ValidationError clean() would have raised, with the
+       same messages.
+
+       At most two chunks per worker are submitted or waiting to be
+       collected at a time, so values can be a generator over more input
+       than would fit in memory as chunks.
+       With one worker, or before Python 3.7, everything is done in this
+       process."""
+    if workers is None:
+        # cpu_count() is None if the number of CPUs can't be found.
+        workers = (os.cpu_count() if hasattr(os, 'cpu_count') else None) or 1
+    if workers <= 1 or ProcessPoolExecutor is None:
+        clean = ApproximateDateFormField(required=False).clean
+        results = []
+        for value in values:
+            try:
+                results.append(clean(value))
+            except ValidationError as e:
+                results.append(e)
+        return results
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers, initializer=_setup_worker, initargs=(os.environ.get('DJANGO_SETTINGS_MODULE'),))
+    results = []
+    pending = collections.deque()
+    with executor:
+        for chunk in _chunks(values, chunk_size):
+            if len(pending) >= workers * 2:
+                results.extend(_decode_chunk(pending.popleft().result()))
+            pending.append(executor.submit(_parse_chunk, chunk))
+        while pending:
+            results.extend(_decode_chunk(pending.popleft().result()))
+    return results
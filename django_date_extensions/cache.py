@@ -0,0 +1,48 @@
+from collections import namedtuple, OrderedDict
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+class LRUCache(object):
+    """A dictionary holding at most maxsize items, dropping the least
+       recently used first. A maxsize of 0 turns it off entirely.
+
+       It takes no lock: two threads missing on the same key at once both
+       work the value out, and the hit and miss counts are approximate."""
+
+    def __init__(self, maxsize=0):
+        self.maxsize = maxsize
+        self.clear()
+
+    def get(self, key, default=None):
+        if not self.maxsize:
+            return default
+        try:
+            value = self._data.pop(key)
+        except KeyError:
+            self.misses += 1
+            return default
+        self._data[key] = value
+        self.hits += 1
+        return value
+
+    def set(self, key, value):
+        if not self.maxsize:
+            return
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            try:
+                self._data.popitem(last=False)
+            except KeyError:
+                break
+
+    def resize(self, maxsize):
+        self.maxsize = maxsize
+        self.clear()
+
+    def clear(self):
+        self._data = OrderedDict()
+        self.hits = self.misses = 0
+
+    def info(self):
+        return CacheInfo(self.hits, self.misses, self.maxsize, len(self._data))
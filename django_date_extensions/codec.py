@@ -0,0 +1,23 @@
+"""Compact encodings of ApproximateDates for caches and APIs.
+
+JSON: ApproximateDateJSONEncoder writes ApproximateDates as their stored
+form, YYYY-MM-DD (with 00 for an unknown month or day), 'future' or
+'past', which fields.decode() turns back into ApproximateDates.
+
+Binary: pack() turns a sequence of ApproximateDates (or None) into a byte
+string of little-endian 32-bit sort keys, four bytes a value, and unpack()
+turns it back, which is smaller and quicker than pickling each value.
+"""
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .core import NONE_KEY, ApproximateDate, pack, unpack  # noqa: F401
+
+
+class ApproximateDateJSONEncoder(DjangoJSONEncoder):
+    """DjangoJSONEncoder that also encodes ApproximateDates, e.g. for
+       JsonResponse(data, encoder=ApproximateDateJSONEncoder)."""
+
+    def default(self, o):
+        if isinstance(o, ApproximateDate):
+            return repr(o)
+        return super(ApproximateDateJSONEncoder, self).default(o)
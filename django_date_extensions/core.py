@@ -0,0 +1,589 @@
+"""ApproximateDate and everything needed to parse, store and render it,
+without importing Django.
+
+This is what fields.py and the other Django parts are built on, and can be
+used on its own, e.g. by scripts and workers that only need to parse and
+encode dates, without paying for importing or configuring Django:
+
+    from django_date_extensions.core import ApproximateDate, decode, encode, parse
+
+Settings are looked up the first time each is used: from Django's settings
+if they are configured (or DJANGO_SETTINGS_MODULE is set), and otherwise
+the defaults below, without importing Django at all. Without Django, str()
+renders dates with plain_format(), which understands the common date format
+specifiers, with month names from the calendar module.
+"""
+import calendar
+import datetime
+import os
+import re
+import struct
+import sys
+
+from . import parsing
+
+# Each of these can be overridden by a Django setting of the same name
+# prefixed with DATE_EXTENSIONS_, e.g. DATE_EXTENSIONS_OUTPUT_FORMAT_YEAR.
+PREFIX = 'DATE_EXTENSIONS_'
+
+DEFAULTS = {
+    'OUTPUT_FORMAT_DAY_MONTH_YEAR': "jS F Y",
+
+    'OUTPUT_FORMAT_MONTH_YEAR': "F Y",
+
+    'OUTPUT_FORMAT_YEAR': "Y",
+
+    # The same as the built-in Django one, but with the d/m/y ones the right way round ;)
+    'DATE_INPUT_FORMATS': (
+        '%Y-%m-%d',  # '2006-10-25',
+        '%d/%m/%Y', '%d/%m/%y',  # '25/10/2006', '25/10/06'
+        '%b %d %Y', '%b %d, %Y',  # 'Oct 25 2006', 'Oct 25, 2006'
+        '%d %b %Y', '%d %b, %Y',  # '25 Oct 2006', '25 Oct, 2006'
+        '%B %d %Y', '%B %d, %Y',  # 'October 25 2006', 'October 25, 2006'
+        '%d %B %Y', '%d %B, %Y',  # '25 October 2006', '25 October, 2006'
+    ),
+
+    'MONTH_INPUT_FORMATS': (
+        '%m/%Y', '%m-%Y',  # '10/2006', '10-2006'
+        '%b %Y', '%Y %b',  # 'Oct 2006', '2006 Oct'
+        '%B %Y', '%Y %B',  # 'October 2006', '2006 October'
+    ),
+
+    'YEAR_INPUT_FORMATS': (
+        '%Y',  # '2006'
+    ),
+
+    'DAY_MONTH_INPUT_FORMATS': (
+        '%m-%d', '%d/%m',  # '10-25', '25/10'
+        '%b %d', '%d %b',  # 'Oct 25', '25 Oct'
+        '%B %d', '%d %B',  # 'October 25', '25 October'
+    ),
+
+    # How many distinct inputs each form field class remembers the parsed
+    # result of; 0 turns the cache off.
+    'PARSE_CACHE_SIZE': 0,
+
+    # Whether form fields should learn which input formats are used most
+    # and try those first (where that cannot change any result), and after
+    # how many inputs to reconsider the order.
+    'ADAPTIVE_INPUT_ORDER': False,
+    'ADAPTIVE_INPUT_INTERVAL': 1000,
+
+    # Whether to time parsing, decoding, encoding and rendering, and the
+    # dotted paths of any sinks to send the timings to besides the
+    # in-process recorder; see django_date_extensions.instrumentation.
+    'INSTRUMENTATION': False,
+    'INSTRUMENTATION_SINKS': (),
+}
+
+
+def _django_settings():
+    """Django's settings, if there are any to use, without importing Django
+       unless it has been already or DJANGO_SETTINGS_MODULE is set."""
+    from_environment = bool(os.environ.get('DJANGO_SETTINGS_MODULE'))
+    if not from_environment and 'django.conf' not in sys.modules:
+        return None
+    try:
+        from django.conf import settings
+    except ImportError:
+        return None
+    return settings if from_environment or settings.configured else None
+
+
+class Settings(object):
+    """The settings, each worked out the first time it is used, plus
+       format_date, the function str() renders dates with, and parsers,
+       the input parsers made for them, by name and locale."""
+
+    def __getattr__(self, name):
+        if name == 'parsers':
+            value = {}
+        elif name == 'format_date':
+            if _django_settings() is None:
+                value = plain_format
+            else:
+                from .formatting import format_date as value
+        else:
+            try:
+                default = DEFAULTS[name]
+            except KeyError:
+                raise AttributeError(name)
+            django_settings = _django_settings()
+            value = default if django_settings is None else getattr(django_settings, PREFIX + name, default)
+        self.__dict__[name] = value
+        return value
+
+    def clear(self):
+        """Forget the settings, to look them up again when next used."""
+        self.__dict__.clear()
+
+
+conf = Settings()
+
+
+def ordinal_suffix(day):
+    """The English suffix for a day of the month, as Django's S specifier."""
+    if day in (11, 12, 13):
+        return 'th'
+    return {1: 'st', 2: 'nd', 3: 'rd'}.get(day % 10, 'th')
+
+
+# Functions of a date for the Django date format specifiers that are the
+# same in any language.
+NUMERIC_SPECIFIERS = {
+    'd': lambda value: '%02d' % value.day,
+    'j': lambda value: '%d' % value.day,
+    'S': lambda value: ordinal_suffix(value.day),
+    'm': lambda value: '%02d' % value.month,
+    'n': lambda value: '%d' % value.month,
+}
+
+_PLAIN_SPECIFIERS = dict(
+    NUMERIC_SPECIFIERS,
+    F=lambda value: calendar.month_name[value.month],
+    M=lambda value: calendar.month_abbr[value.month],
+    b=lambda value: calendar.month_abbr[value.month].lower(),
+    y=lambda value: '%02d' % (value.year % 100),
+    Y=lambda value: '%d' % value.year,
+)
+
+
+def plain_format(value, format_string):
+    """Render a date with a Django date format string, without Django:
+       d, j, S, m, n, F, M, b, y and Y are understood, and anything else
+       is copied as it is, as is any character after a backslash."""
+    pieces = []
+    escaped = False
+    for char in format_string:
+        if escaped:
+            pieces.append(char)
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif char in _PLAIN_SPECIFIERS:
+            pieces.append(_PLAIN_SPECIFIERS[char](value))
+        else:
+            pieces.append(char)
+    return ''.join(pieces)
+
+
+def _unicode_compatible(cls):
+    """As Django's python_2_unicode_compatible once did."""
+    if sys.version_info[0] == 2:
+        cls.__unicode__ = cls.__str__
+        cls.__str__ = lambda self: self.__unicode__().encode('utf-8')
+    return cls
+
+
+# Month 0 is an unknown month, which can only have an unknown day.
+DAYS_IN_MONTH = (0, 31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
+
+# Sort keys: past, then each date as the integer YYYYMMDD, then future.
+PAST_SORT_KEY = 0
+FUTURE_SORT_KEY = 100000000
+
+# The days past and future are taken to be when treated as ranges of days.
+FIRST_ORDINAL = datetime.date.min.toordinal()
+LAST_ORDINAL = datetime.date.max.toordinal()
+
+
+@_unicode_compatible
+class ApproximateDate(object):
+    """A date object that accepts 0 for month or day to mean we don't
+       know when it is within that month/year.
+
+       Instances are immutable and hashable, and there is only ever one
+       future and one past instance. Each has an integer sort key, so an
+       unknown month or day sorts before any known one, past sorts before
+       all dates and future after them.
+
+       Each also stands for the range of days it could be: earliest() to
+       latest(). Past is taken to be the first day there is, and future
+       the last."""
+    __slots__ = ('_year', '_month', '_day', '_key', '_span')
+
+    def __new__(cls, year=0, month=0, day=0, future=False, past=False):
+        if future and past:
+            raise ValueError("Can't be both future and past")
+        elif future or past:
+            if year or month or day:
+                raise ValueError("Future or past dates can have no year, month or day")
+            if cls is ApproximateDate:
+                return _future if future else _past
+            self = cls._make(0, 0, 0)
+            if future:
+                self._key = FUTURE_SORT_KEY
+            return self
+        elif year:
+            if day and not month:
+                raise ValueError("You cannot specify just a year and a day")
+            valid = type(year) is int and type(month) is int and type(day) is int and (
+                0 < year < 10000 and 0 <= month <= 12 and (
+                    0 <= day <= DAYS_IN_MONTH[month] or (month == 2 and day == 29 and calendar.isleap(year))))
+            if not valid:
+                # Let datetime raise the error it always has.
+                datetime.date(year, month or 1, day or 1)
+        else:
+            # Unpickling calls __new__() with no arguments, then __setstate__();
+            # anything else without a year is refused by __init__().
+            return object.__new__(cls)
+        self = object.__new__(cls)
+        self._year = year
+        self._month = month
+        self._day = day
+        self._key = year * 10000 + month * 100 + day
+        return self
+
+    def __init__(self, year=0, month=0, day=0, future=False, past=False):
+        if not (year or future or past):
+            raise ValueError("You must specify a year")
+
+    def __setstate__(self, state):
+        # The instance __dict__, as pickled before instances had slots.
+        if state['future'] or state['past']:
+            self._year = self._month = self._day = 0
+            self._key = FUTURE_SORT_KEY if state['future'] else PAST_SORT_KEY
+        else:
+            self._year = state['year']
+            self._month = state['month']
+            self._day = state['day']
+            self._key = self._year * 10000 + self._month * 100 + self._day
+
+    @classmethod
+    def _make(cls, year, month, day):
+        """Create a dated instance without any checks, for values already
+           known to be valid, such as those the field itself has stored."""
+        self = object.__new__(cls)
+        self._year = year
+        self._month = month
+        self._day = day
+        self._key = year * 10000 + month * 100 + day
+        return self
+
+    @classmethod
+    def _from_key(cls, key):
+        """The instance with the given sort key, again without any checks."""
+        if key == PAST_SORT_KEY:
+            return _past
+        if key == FUTURE_SORT_KEY:
+            return _future
+        return cls._make(key // 10000, key // 100 % 100, key % 100)
+
+    year = property(lambda self: self._year)
+    month = property(lambda self: self._month)
+    day = property(lambda self: self._day)
+    future = property(lambda self: self._key == FUTURE_SORT_KEY)
+    past = property(lambda self: self._key == PAST_SORT_KEY)
+
+    def sort_key(self):
+        """An integer that orders approximate dates the same way they
+           compare, e.g. for sorted(dates, key=ApproximateDate.sort_key)."""
+        return self._key
+
+    def _ordinals(self):
+        """The first and last days this could be, as ordinals, worked out
+           the first time they are needed."""
+        try:
+            return self._span
+        except AttributeError:
+            pass
+        if self._key == PAST_SORT_KEY:
+            span = (FIRST_ORDINAL, FIRST_ORDINAL)
+        elif self._key == FUTURE_SORT_KEY:
+            span = (LAST_ORDINAL, LAST_ORDINAL)
+        else:
+            year, month, day = self._year, self._month, self._day
+            first = datetime.date(year, month or 1, day or 1).toordinal()
+            if day:
+                span = (first, first)
+            elif month:
+                span = (first, first + calendar.monthrange(year, month)[1] - 1)
+            else:
+                span = (first, datetime.date(year, 12, 31).toordinal())
+        self._span = span
+        return span
+
+    def earliest(self):
+        """The first day this could be, as a datetime.date."""
+        return datetime.date.fromordinal(self._ordinals()[0])
+
+    def latest(self):
+        """The last day this could be, as a datetime.date."""
+        return datetime.date.fromordinal(self._ordinals()[1])
+
+    def overlaps(self, other):
+        """Whether this and other, an ApproximateDate or date, could be the
+           same day."""
+        first, last = self._ordinals()
+        other_first, other_last = _ordinals(other)
+        return first <= other_last and other_first <= last
+
+    def certainly_before(self, other):
+        """Whether this must be before other, an ApproximateDate or date,
+           whichever days within them they turn out to be."""
+        return self._ordinals()[1] < _ordinals(other)[0]
+
+    @property
+    def precision(self):
+        """'day', 'month' or 'year', or 'future' or 'past' for those."""
+        if self.future:
+            return 'future'
+        if self.past:
+            return 'past'
+        if self._day:
+            return 'day'
+        return 'month' if self._month else 'year'
+
+    def __reduce__(self):
+        # Just the sort key, which is all there is to an ApproximateDate.
+        if type(self) is ApproximateDate:
+            return _unpickle, (self._key,)
+        return type(self), (self._year, self._month, self._day, self.future, self.past)
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __hash__(self):
+        if self._day:
+            # Equal to the same day as a datetime.date, so must hash the same.
+            return hash(datetime.date(self._year, self._month, self._day))
+        return hash(self._key)
+
+    def __repr__(self):
+        # This is also how the field stores it.
+        if self._key == FUTURE_SORT_KEY:
+            return 'future'
+        if self._key == PAST_SORT_KEY:
+            return 'past'
+        return '%04d-%02d-%02d' % (self._year, self._month, self._day)
+
+    def __str__(self):
+        if self.future:
+            return 'future'
+        if self.past:
+            return 'past'
+        elif self.year and self.month and self.day:
+            return conf.format_date(self, conf.OUTPUT_FORMAT_DAY_MONTH_YEAR)
+        elif self.year and self.month:
+            return conf.format_date(self, conf.OUTPUT_FORMAT_MONTH_YEAR)
+        elif self.year:
+            return conf.format_date(self, conf.OUTPUT_FORMAT_YEAR)
+
+    def _keys(self, other):
+        # Against anything other than an ApproximateDate, such as a
+        # datetime.date, future counts as having no year, just like past.
+        key = self._key
+        if key == FUTURE_SORT_KEY:
+            key = PAST_SORT_KEY
+        return key, other.year * 10000 + other.month * 100 + other.day
+
+    def __eq__(self, other):
+        if isinstance(other, ApproximateDate):
+            return self._key == other._key
+        if isinstance(other, datetime.date):
+            key, other_key = self._keys(other)
+            return key == other_key
+        return False
+
+    def __ne__(self, other):
+        return not (self == other)
+
+    def __lt__(self, other):
+        if isinstance(other, ApproximateDate):
+            return self._key < other._key
+        if other is None:
+            return False
+        key, other_key = self._keys(other)
+        return key < other_key
+
+    def __le__(self, other):
+        if isinstance(other, ApproximateDate):
+            return self._key <= other._key
+        if other is None:
+            return False
+        key, other_key = self._keys(other)
+        return key <= other_key
+
+    def __gt__(self, other):
+        if isinstance(other, ApproximateDate):
+            return self._key > other._key
+        if other is None:
+            return True
+        key, other_key = self._keys(other)
+        return key > other_key
+
+    def __ge__(self, other):
+        if isinstance(other, ApproximateDate):
+            return self._key >= other._key
+        if other is None:
+            return True
+        key, other_key = self._keys(other)
+        return key >= other_key
+
+    def __len__(self):
+        return len(self.__repr__())
+
+
+def _unpickle(key):
+    """Unpickle an ApproximateDate from its sort key."""
+    return ApproximateDate._from_key(key)
+
+
+def _ordinals(value):
+    """The first and last days an ApproximateDate or date could be."""
+    if isinstance(value, ApproximateDate):
+        return value._ordinals()
+    if isinstance(value, datetime.datetime):
+        value = value.date()
+    if isinstance(value, datetime.date):
+        ordinal = value.toordinal()
+        return ordinal, ordinal
+    raise TypeError('Expected an ApproximateDate or date, not %r' % (value,))
+
+
+_past = ApproximateDate._make(0, 0, 0)
+_future = ApproximateDate._make(0, 0, 0)
+_future._key = FUTURE_SORT_KEY
+
+ansi_date_re = re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$')
+
+
+def _stored_fields(value):
+    """The integer (year, month, day) of a string laid out exactly as the
+       field writes it, found without a regex, or None for anything else."""
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        year, month, day = value[:4], value[5:7], value[8:]
+        if year.isdigit() and month.isdigit() and day.isdigit():
+            try:
+                return int(year), int(month), int(day)
+            except ValueError:
+                pass
+    return None
+
+
+def decode(value):
+    """Turn a stored string, YYYY-MM-DD, future or past, into an
+       ApproximateDate, validating it fully. Empty values become ''.
+       Raises ValueError for anything else."""
+    if not value:
+        return ''
+
+    if value == 'future':
+        return ApproximateDate(future=True)
+    if value == 'past':
+        return ApproximateDate(past=True)
+
+    fields = _stored_fields(value)
+    if fields is None:
+        if not ansi_date_re.search(value):
+            raise ValueError('Enter a valid date in YYYY-MM-DD format.')
+        fields = map(int, value.split('-'))
+    year, month, day = fields
+
+    try:
+        return ApproximateDate(year, month, day)
+    except ValueError as e:
+        raise ValueError('Invalid date: %s' % str(e))
+
+
+def encode(value):
+    """The string an ApproximateDate, date, or string already in the stored
+       form is stored as, '' for an empty value. Raises ValueError for any
+       other string."""
+    if not value:
+        return ''
+    if isinstance(value, ApproximateDate):
+        return repr(value)
+    if isinstance(value, datetime.date):
+        return '%04d-%02d-%02d' % (value.year, value.month, value.day)
+    if value == 'future':
+        return 'future'
+    if value == 'past':
+        return 'past'
+    if not ansi_date_re.search(value):
+        raise ValueError('Enter a valid date in YYYY-MM-DD format.')
+    return value
+
+
+# The packed key of None.
+NONE_KEY = -1
+
+
+def pack(values):
+    """Pack a sequence of ApproximateDates and Nones into a byte string of
+       little-endian 32-bit sort keys."""
+    keys = [NONE_KEY if value is None else value._key for value in values]
+    return struct.pack('<%di' % len(keys), *keys)
+
+
+def unpack(data):
+    """The list of ApproximateDates and Nones that pack() was given."""
+    from_key = ApproximateDate._from_key
+    return [
+        None if key == NONE_KEY else from_key(key)
+        for key in struct.unpack('<%di' % (len(data) // 4), data)
+    ]
+
+
+_suffix_re = re.compile(r'(?<=\d)(st|nd|rd|th)')
+
+
+def strip_suffixes(value):
+    """Input with surrounding space and ordinal suffixes (1st, 2nd, ...)
+       removed, ready to parse."""
+    return _suffix_re.sub('', value.strip())
+
+
+def get_input_parser(name, groups):
+    """parsing.get_parser() for the (tag, formats) groups, adaptive or not
+       as the settings say. It is kept under name for the current locale
+       until the settings change, so groups, a function returning them, is
+       only called the first time."""
+    key = (name, parsing.current_locale())
+    try:
+        return conf.parsers[key]
+    except KeyError:
+        parser = parsing.get_parser(
+            *groups(), adaptive=conf.ADAPTIVE_INPUT_ORDER, interval=conf.ADAPTIVE_INPUT_INTERVAL)
+        return conf.parsers.setdefault(key, parser)
+
+
+def _input_groups():
+    return [
+        ('date', conf.DATE_INPUT_FORMATS),
+        ('month', conf.MONTH_INPUT_FORMATS),
+        ('year', conf.YEAR_INPUT_FORMATS),
+    ]
+
+
+def input_parser():
+    """The parser for approximate date input in the current settings and
+       locale. Its order() is the order formats are tried in."""
+    return get_input_parser('approximate', _input_groups)
+
+
+def _to_approximate_date(tag, year, month, day, yday):
+    if tag == 'date':
+        return ApproximateDate(year, month, day)
+    if tag == 'month':
+        return ApproximateDate(year, month, 0)
+    return ApproximateDate(year, 0, 0)
+
+
+def parse(value):
+    """An ApproximateDate from input such as '25th October 2006', 'Oct 2006'
+       or 'future', as ApproximateDateFormField accepts it, or None if it
+       is empty. Raises ValueError if it is not a valid date."""
+    if not value:
+        return None
+    if value == 'future':
+        return ApproximateDate(future=True)
+    if value == 'past':
+        return ApproximateDate(past=True)
+    if isinstance(value, ApproximateDate):
+        return value
+    return input_parser().parse(strip_suffixes(value), _to_approximate_date)
@@ -1,176 +1,413 @@
 import datetime
-import time
-import re
-from functools import total_ordering
 
+from django.core.signals import setting_changed
 from django.db import models
 from django import forms
 from django.forms import ValidationError
-from django.utils import dateformat
-try:
-    from django.utils.encoding import python_2_unicode_compatible
-except ImportError:
-    # Django 3+, no longer present, we know wre are Python 3, so can be null
-    def python_2_unicode_compatible(f): return f
-
-from . import settings
-from .widgets import PrettyDateInput
-
-
-@total_ordering
-@python_2_unicode_compatible
-class ApproximateDate(object):
-    """A date object that accepts 0 for month or day to mean we don't
-       know when it is within that month/year."""
-    def __init__(self, year=0, month=0, day=0, future=False, past=False):
-        if future and past:
-            raise ValueError("Can't be both future and past")
-        elif future or past:
-            if year or month or day:
-                raise ValueError("Future or past dates can have no year, month or day")
-        elif year and month and day:
-            datetime.date(year, month, day)
-        elif year and month:
-            datetime.date(year, month, 1)
-        elif year and day:
-            raise ValueError("You cannot specify just a year and a day")
-        elif year:
-            datetime.date(year, 1, 1)
-        else:
-            raise ValueError("You must specify a year")
-
-        self.future = future
-        self.past = past
-        self.year = year
-        self.month = month
-        self.day = day
-
-    def __repr__(self):
-        if self.future or self.past:
-            return str(self)
-        return "{year:04d}-{month:02d}-{day:02d}".format(year=self.year, month=self.month, day=self.day)
-
-    def __str__(self):
-        if self.future:
-            return 'future'
-        if self.past:
-            return 'past'
-        elif self.year and self.month and self.day:
-            return dateformat.format(self, settings.OUTPUT_FORMAT_DAY_MONTH_YEAR)
-        elif self.year and self.month:
-            return dateformat.format(self, settings.OUTPUT_FORMAT_MONTH_YEAR)
-        elif self.year:
-            return dateformat.format(self, settings.OUTPUT_FORMAT_YEAR)
 
-    def __eq__(self, other):
-        if isinstance(other, (datetime.date, datetime.datetime)):
-            return (self.year, self.month, self.day) ==\
-                   (other.year, other.month, other.day)
-
-        if not isinstance(other, ApproximateDate):
-            return False
-
-        return (self.year, self.month, self.day, self.future, self.past) ==\
-               (other.year, other.month, other.day, other.future, other.past)
-
-    def __ne__(self, other):
-        return not (self == other)
-
-    def __lt__(self, other):
-        if other is None:
-            return False
-
-        if isinstance(other, ApproximateDate):
-            if self.future or other.future:
-                return not self.future
-            if self.past or other.past:
-                return not other.past
+from . import core, instrumentation, lookups, settings
+from .cache import LRUCache
+# ApproximateDate and the rest of core are imported from here too.
+from .core import (  # noqa: F401
+    DAYS_IN_MONTH, FIRST_ORDINAL, FUTURE_SORT_KEY, LAST_ORDINAL, PAST_SORT_KEY, ApproximateDate, ansi_date_re,
+    get_input_parser, input_parser, strip_suffixes,
+)
+from .widgets import PrettyDateInput
 
-        return (self.year, self.month, self.day) < (other.year, other.month, other.day)
 
-    def __len__(self):
-        return len(self.__repr__())
+def decode(value):
+    """core.decode(), raising ValidationError for a value that is not valid."""
+    try:
+        return core.decode(value)
+    except ValueError as e:
+        raise ValidationError(str(e))
 
 
-ansi_date_re = re.compile(r'^\d{4}-\d{1,2}-\d{1,2}$')
+# How many distinct values a single query remembers the decoded form of,
+# as does ApproximateDateField.to_python().
+DB_MEMO_SIZE = 10000
+_decoded = {}
 
 
 class ApproximateDateField(models.CharField):
     """A model field to store ApproximateDate objects in the database
        (as a CharField because MySQLdb intercepts dates from the
-       database and forces them to be datetime.date()s."""
+       database and forces them to be datetime.date()s.
+
+       Values read back from the database are trusted to be ones the field
+       wrote, unless strict is True, when they are fully validated."""
 
     description = "An approximate date"
 
     def __init__(self, *args, **kwargs):
         kwargs['max_length'] = 10
+        self.strict = kwargs.pop('strict', False)
         super(ApproximateDateField, self).__init__(*args, **kwargs)
 
     def deconstruct(self):
         name, path, args, kwargs = super(ApproximateDateField, self).deconstruct()
         del kwargs['max_length']
+        if self.strict:
+            kwargs['strict'] = True
         return name, path, args, kwargs
 
+    def get_db_converters(self, connection):
+        if self.strict:
+            return super(ApproximateDateField, self).get_db_converters(connection)
+        return [self._db_converter()]
+
+    def _db_converter(self):
+        """A converter for one query, remembering values it has seen."""
+        memo = {}
+
+        def convert(value, *args):
+            try:
+                return memo[value]
+            except KeyError:
+                pass
+            result = self.decode_trusted(value)
+            if len(memo) >= DB_MEMO_SIZE:
+                memo.clear()
+            memo[value] = result
+            return result
+        return convert
+
+    def decode_trusted(self, value):
+        """from_db_value() for a value known to have been stored by the
+           field, skipping validation for ones in YYYY-MM-DD format."""
+        fields = core._stored_fields(value) if value else None
+        if fields is None:
+            return decode(value)
+        return ApproximateDate._make(*fields)
+
     def to_python(self, value):
         if isinstance(value, ApproximateDate):
             return value
-
-        return self.from_db_value(value)
+        # Deserializing a fixture calls this for every value, and the same
+        # ones turn up again and again.
+        try:
+            return _decoded[value]
+        except KeyError:
+            pass
+        except TypeError:
+            return self.from_db_value(value)
+        result = self.from_db_value(value)
+        if len(_decoded) >= DB_MEMO_SIZE:
+            _decoded.clear()
+        _decoded[value] = result
+        return result
 
     def from_db_value(self, value, *args, **kwarsg):
-        if not value:
-            return ''
+        return decode(value)
 
-        if value == 'future':
-            return ApproximateDate(future=True)
-        if value == 'past':
-            return ApproximateDate(past=True)
-
-        if not ansi_date_re.search(value):
-            raise ValidationError('Enter a valid date in YYYY-MM-DD format.')
-
-        year, month, day = map(int, value.split('-'))
+    def get_prep_value(self, value):
         try:
-            return ApproximateDate(year, month, day)
+            return core.encode(value)
         except ValueError as e:
-            msg = 'Invalid date: %s' % str(e)
-            raise ValidationError(msg)
+            raise ValidationError(str(e))
+
+    def get_prep_values(self, values):
+        """get_prep_value() for a whole column of values at once, e.g. to
+           encode them ahead of a bulk_create() or bulk_update()."""
+        prep_value = self.get_prep_value
+        encoded = []
+        append = encoded.append
+        for value in values:
+            if type(value) is ApproximateDate and PAST_SORT_KEY < value._key < FUTURE_SORT_KEY:
+                append('%04d-%02d-%02d' % (value._year, value._month, value._day))
+            else:
+                append(prep_value(value))
+        return encoded
+
+    def value_to_string(self, obj):
+        value = getattr(obj, self.attname)
+        if type(value) is ApproximateDate:
+            return repr(value)
+        return self.get_prep_value(value)
+
+    def formfield(self, **kwargs):
+        defaults = {'form_class': ApproximateDateFormField}
+        defaults.update(kwargs)
+        return super(ApproximateDateField, self).formfield(**defaults)
+
+
+ApproximateDateField.register_lookup(lookups.ApproximateLessThan)
+ApproximateDateField.register_lookup(lookups.ApproximateLessThanOrEqual)
+ApproximateDateField.register_lookup(lookups.ApproximateGreaterThan)
+ApproximateDateField.register_lookup(lookups.ApproximateGreaterThanOrEqual)
+ApproximateDateField.register_lookup(lookups.ApproximateRange)
+ApproximateDateField.register_lookup(lookups.ApproxYear)
+ApproximateDateField.register_lookup(lookups.ApproxMonth)
+ApproximateDateField.register_lookup(lookups.ApproxPrecision)
+ApproximateDateField.register_lookup(lookups.ApproxEarliest)
+ApproximateDateField.register_lookup(lookups.ApproxLatest)
+ApproximateDateField.register_lookup(lookups.Overlaps)
+ApproximateDateField.register_lookup(lookups.CertainlyBefore)
+
+
+class ApproximateDateIntegerField(models.IntegerField):
+    """A model field to store ApproximateDate objects in the database as
+       their integer sort key, so the database orders and compares them the
+       same way Python does, and they take up less room than as strings.
+       An empty value is stored as NULL."""
+
+    description = "An approximate date, stored as an integer"
+
+    def from_db_value(self, value, *args, **kwargs):
+        if value is None:
+            return value
+        return ApproximateDate._from_key(value)
+
+    def to_python(self, value):
+        if value is None or value == '':
+            return None
+        if isinstance(value, ApproximateDate):
+            return value
+        if isinstance(value, datetime.date):
+            return ApproximateDate(value.year, value.month, value.day)
+        if isinstance(value, int):
+            if value in (PAST_SORT_KEY, FUTURE_SORT_KEY):
+                return ApproximateDate._from_key(value)
+            try:
+                return ApproximateDate(value // 10000, value // 100 % 100, value % 100)
+            except ValueError as e:
+                raise ValidationError('Invalid date: %s' % str(e))
+        return decode(value)
 
     def get_prep_value(self, value):
-        if not value:
-            return ''
+        if value is None or value == '':
+            return None
+        if isinstance(value, int):
+            return value
+        return self.to_python(value).sort_key()
+
+    def value_to_string(self, obj):
+        value = self.value_from_object(obj)
+        return '' if value is None else repr(value)
+
+    @property
+    def validators(self):
+        # The database's integer range checks don't apply to ApproximateDates.
+        return list(self.default_validators) + list(self._validators)
+
+    def formfield(self, **kwargs):
+        defaults = {'form_class': ApproximateDateFormField}
+        defaults.update(kwargs)
+        return super(ApproximateDateIntegerField, self).formfield(**defaults)
+
+
+# Precisions stored alongside the earliest day by ApproximateDateDateField,
+# numbered so that ordering by the day then the precision sorts values the
+# same way as ApproximateDate.
+PRECISION_PAST = 0
+PRECISION_YEAR = 1
+PRECISION_MONTH = 2
+PRECISION_DAY = 3
+PRECISION_FUTURE = 4
+PRECISIONS = {
+    'past': PRECISION_PAST, 'year': PRECISION_YEAR, 'month': PRECISION_MONTH,
+    'day': PRECISION_DAY, 'future': PRECISION_FUTURE,
+}
+
+
+class ApproximateDatePrecisionField(models.PositiveSmallIntegerField):
+    """The precision column ApproximateDateDateField adds for itself."""
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        # Migrations declare this field as well as the one that adds it.
+        if any(field.name == name for field in cls._meta.local_fields):
+            return
+        super(ApproximateDatePrecisionField, self).contribute_to_class(cls, name, *args, **kwargs)
+
+
+class ApproximateDateDescriptor(object):
+    """Puts an ApproximateDateDateField's two columns together as one
+       ApproximateDate, and splits one up when it is set."""
+
+    def __init__(self, field):
+        self.field = field
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+        day = getattr(instance, self.field.attname)
+        precision = getattr(instance, self.field.precision_name)
+        return self.field.combine(day, precision)
+
+    def __set__(self, instance, value):
+        day, precision = self.field.split(value)
+        setattr(instance, self.field.attname, day)
+        setattr(instance, self.field.precision_name, precision)
+
+
+class ApproximateDateDateField(models.DateField):
+    """A model field to store ApproximateDate objects in a native DATE
+       column, holding the earliest day each could be, next to a small
+       integer column, <name>_precision, that it adds to the model itself.
+
+       Database date functions, indexes and lookups work on the DATE column,
+       <name>_date, so compare only the earliest day, and values() gives
+       the dates; ordering by (<name>, <name>_precision) sorts values the
+       same way Python does. Past is stored as the first day there is and
+       future as the last. An empty value is stored as NULL."""
+
+    description = "An approximate date, stored as a date and a precision"
+
+    def get_attname(self):
+        return '%s_date' % self.name
+
+    @property
+    def precision_name(self):
+        return '%s_precision' % self.name
+
+    def contribute_to_class(self, cls, name, *args, **kwargs):
+        super(ApproximateDateDateField, self).contribute_to_class(cls, name, *args, **kwargs)
+        precision = ApproximateDatePrecisionField(null=True, blank=True, editable=False, serialize=False)
+        cls.add_to_class(self.precision_name, precision)
+        setattr(cls, name, ApproximateDateDescriptor(self))
+
+    def combine(self, day, precision):
+        """The ApproximateDate stored as the given day and precision."""
+        if day is None:
+            return None
+        if precision == PRECISION_PAST:
+            return core._past
+        if precision == PRECISION_FUTURE:
+            return core._future
+        if precision == PRECISION_YEAR:
+            return ApproximateDate._make(day.year, 0, 0)
+        if precision == PRECISION_MONTH:
+            return ApproximateDate._make(day.year, day.month, 0)
+        return ApproximateDate._make(day.year, day.month, day.day)
+
+    def split(self, value):
+        """The day and precision to store a value as."""
+        value = self.to_python(value)
+        if value is None:
+            return None, None
         if isinstance(value, ApproximateDate):
-            return repr(value)
+            return value.earliest(), PRECISIONS[value.precision]
+        return value, PRECISION_DAY
+
+    def to_python(self, value):
+        # Plain dates are left as they are, as that is what the date
+        # column itself holds.
+        if value is None or value == '':
+            return None
+        if isinstance(value, ApproximateDate):
+            return value
         if isinstance(value, datetime.date):
-            return dateformat.format(value, "Y-m-d")
-        if value == 'future':
-            return 'future'
-        if value == 'past':
-            return 'past'
-        if not ansi_date_re.search(value):
-            raise ValidationError('Enter a valid date in YYYY-MM-DD format.')
-        return value
+            return super(ApproximateDateDateField, self).to_python(value)
+        return decode(value)
+
+    def get_prep_value(self, value):
+        value = self.to_python(value)
+        if isinstance(value, ApproximateDate):
+            return value.earliest()
+        return super(ApproximateDateDateField, self).get_prep_value(value)
+
+    def value_from_object(self, obj):
+        return getattr(obj, self.name)
 
     def value_to_string(self, obj):
         value = self.value_from_object(obj)
-        return self.get_prep_value(value)
+        return '' if value is None else repr(value)
 
     def formfield(self, **kwargs):
         defaults = {'form_class': ApproximateDateFormField}
         defaults.update(kwargs)
-        return super(ApproximateDateField, self).formfield(**defaults)
+        return super(ApproximateDateDateField, self).formfield(**defaults)
+
+
+# Cached in place of a parse result for input that is not a valid date.
+INVALID = object()
+
+# Cached in place of a parse result for input that depends on today's date,
+# such as a day and month without a year, whose results are cached by day.
+RELATIVE = object()
+
+
+class BatchCleaning(object):
+    """Lets a date form field clean many values at once, and take results a
+       formset has already worked out for it (see
+       django_date_extensions.forms.ApproximateDateFormSetMixin).
 
-#    def get_db_prep_lookup(self, lookup_type, value):
-#        pass
+       Subclasses convert a value that Field.clean() has accepted with
+       _convert(value, today), today being the day to take relative input
+       from, or None to ask today() for it only if it is needed."""
+
+    # Converted results (or ValidationErrors) by input value, set by a
+    # formset that has converted every form's value at once. Each form
+    # still checks required and its validators itself.
+    prefetched = None
+
+    def clean(self, value):
+        if self.prefetched is not None:
+            try:
+                result = self.prefetched[value]
+            except (KeyError, TypeError):
+                pass
+            else:
+                self.validate_input(value)
+                if isinstance(result, ValidationError):
+                    raise ValidationError(result.error_list)
+                return result
+        return self._clean(value, None)
+
+    def _clean(self, value, today):
+        self.validate_input(value)
+        return self._convert(value, today)
+
+    def today(self):
+        return None
+
+    def validate_input(self, value):
+        """Field.clean(), for required and any validators."""
+        super(BatchCleaning, self).clean(value)
+
+    def clean_many(self, values, today=None):
+        """clean() each of values, in order, working out each distinct value
+           only once and all as of the same day, by default today(). Each
+           result is the cleaned value or the ValidationError clean() would
+           have raised, with the same messages."""
+        return self._each(self._clean, values, today)
+
+    def convert_many(self, values, today=None):
+        """As clean_many(), but without checking required or validators."""
+        return self._each(self._convert, values, today)
+
+    def _each(self, method, values, today):
+        if today is None:
+            today = self.today()
+        seen = {}
+        results = []
+        for value in values:
+            try:
+                result = seen[value]
+            except KeyError:
+                result = seen[value] = self._result_or_error(method, value, today)
+            except TypeError:
+                result = self._result_or_error(method, value, today)
+            results.append(result)
+        return results
+
+    @staticmethod
+    def _result_or_error(method, value, today):
+        try:
+            return method(value, today)
+        except ValidationError as e:
+            return e
 
 
 # TODO: Expand to work more like my PHP strtotime()-using function
-class ApproximateDateFormField(forms.fields.Field):
+class ApproximateDateFormField(BatchCleaning, forms.fields.Field):
+    # Parsed results, keyed by input after suffixes have been removed.
+    parse_cache = LRUCache(settings.PARSE_CACHE_SIZE)
+
     def __init__(self, max_length=10, empty_value='', *args, **kwargs):
         super(ApproximateDateFormField, self).__init__(*args, **kwargs)
 
-    def clean(self, value):
-        super(ApproximateDateFormField, self).clean(value)
+    def _convert(self, value, today):
         if not value:
             return None
         if value == 'future':
@@ -179,44 +416,49 @@ class ApproximateDateFormField(forms.fields.Field):
             return ApproximateDate(past=True)
         if isinstance(value, ApproximateDate):
             return value
-        value = re.sub(r'(?<=\d)(st|nd|rd|th)', '', value.strip())
-        for date_format in settings.DATE_INPUT_FORMATS:
-            try:
-                return ApproximateDate(*time.strptime(value, date_format)[:3])
-            except ValueError:
-                continue
-        for month_format in settings.MONTH_INPUT_FORMATS:
+        value = strip_suffixes(value)
+        result = self.parse_cache.get(value)
+        if result is None:
             try:
-                match = time.strptime(value, month_format)
-                return ApproximateDate(match[0], match[1], 0)
+                result = self.parser().parse(value, core._to_approximate_date)
             except ValueError:
-                continue
-        for year_format in settings.YEAR_INPUT_FORMATS:
-            try:
-                return ApproximateDate(time.strptime(value, year_format)[0], 0, 0)
-            except ValueError:
-                continue
-        raise ValidationError('Please enter a valid date.')
+                result = INVALID
+            self.parse_cache.set(value, result)
+        if result is INVALID:
+            raise ValidationError('Please enter a valid date.')
+        return result
+
+    @classmethod
+    def parser(cls):
+        """The parser for the input formats in the current settings and
+           locale. Its order() is the order they are tried in."""
+        return input_parser()
 
 
 # PrettyDateField - same as DateField but accepts slightly more input,
 # like ApproximateDateFormField above. If initialised with future=True,
 # it will assume a date without year means the current year (or the next
 # year if the day is before the current date). If future=False, it does
-# the same but in the past.
-class PrettyDateField(forms.fields.Field):
+# the same but in the past. The current date comes from clock, if given,
+# otherwise datetime.date.today.
+class PrettyDateField(BatchCleaning, forms.fields.Field):
     widget = PrettyDateInput
+    # Parsed results, keyed by input after suffixes have been removed and
+    # the future setting, plus today's date for RELATIVE ones.
+    parse_cache = LRUCache(settings.PARSE_CACHE_SIZE)
 
     def __init__(self, future=None, *args, **kwargs):
         self.future = future
+        self.clock = kwargs.pop('clock', None)
         super(PrettyDateField, self).__init__(*args, **kwargs)
 
-    def clean(self, value):
+    def today(self):
+        return (self.clock or datetime.date.today)()
+
+    def _convert(self, value, today):
         """
-        Validates that the input can be converted to a date. Returns a Python
-        datetime.date object.
+        Converts the input to a date. Returns a Python datetime.date object.
         """
-        super(PrettyDateField, self).clean(value)
         if not value:
             return None
         if value == 'future':
@@ -227,28 +469,79 @@ class PrettyDateField(forms.fields.Field):
             return value.date()
         if isinstance(value, datetime.date):
             return value
-        value = re.sub(r'(?<=\d)(st|nd|rd|th)', '', value.strip())
-        for date_input_format in settings.DATE_INPUT_FORMATS:
-            try:
-                return datetime.date(*time.strptime(value, date_input_format)[:3])
-            except ValueError:
-                continue
+        value = strip_suffixes(value)
+        key = (value, self.future)
+        result = self.parse_cache.get(key)
+        if result is None:
+            result, today = self._parse(value, today)
+            if today is None:
+                self.parse_cache.set(key, result)
+            else:
+                self.parse_cache.set(key, RELATIVE)
+                self.parse_cache.set(key + (today,), result)
+        elif result is RELATIVE:
+            today = today or self.today()
+            result = self.parse_cache.get(key + (today,))
+            if result is None:
+                result = self._parse(value, today)[0]
+                self.parse_cache.set(key + (today,), result)
+        if result is INVALID:
+            raise ValidationError('Please enter a valid date.')
+        return result
 
+    def parser(self):
+        """The parser for the input formats in the current settings and
+           locale. Its order() is the order they are tried in."""
+        # Allow year to be omitted if we know whether to look forward or back.
         if self.future is None:
-            raise ValidationError('Please enter a valid date.')
+            return get_input_parser('pretty', self._date_groups)
+        return get_input_parser('pretty_day_month', self._day_month_groups)
 
-        # Allow year to be omitted. Do the sensible thing, either past or future.
-        for day_month_input_format in settings.DAY_MONTH_INPUT_FORMATS:
-            try:
-                t = time.strptime(value, day_month_input_format)
-                month, day, yday = t[1], t[2], t[7]
-                year = datetime.date.today().year
-                if self.future and yday < int(datetime.date.today().strftime('%j')):
-                    year += 1
-                if not self.future and yday > int(datetime.date.today().strftime('%j')):
-                    year -= 1
-                return datetime.date(year, month, day)
-            except ValueError:
-                continue
+    @staticmethod
+    def _date_groups():
+        return [('date', settings.DATE_INPUT_FORMATS)]
+
+    @staticmethod
+    def _day_month_groups():
+        return [('date', settings.DATE_INPUT_FORMATS), ('day_month', settings.DAY_MONTH_INPUT_FORMATS)]
 
-        raise ValidationError('Please enter a valid date.')
+    def _parse(self, value, today):
+        """The date value is, or INVALID, and the day it was taken relative
+           to, or None if it has a year; today is only asked for if needed."""
+        used = []
+
+        def convert(tag, year, month, day, yday):
+            if tag == 'date':
+                return datetime.date(year, month, day)
+            if not used:
+                used.append(today or self.today())
+            return self._to_date(tag, year, month, day, yday, used[0])
+        try:
+            result = self.parser().parse(value, convert)
+        except ValueError:
+            result = INVALID
+        return result, (used[0] if used else None)
+
+    def _to_date(self, tag, year, month, day, yday, today=None):
+        if tag == 'date':
+            return datetime.date(year, month, day)
+
+        # No year given. Do the sensible thing, either past or future.
+        today = today or self.today()
+        year = today.year
+        today_yday = today.timetuple()[7]
+        if self.future and yday < today_yday:
+            year += 1
+        if not self.future and yday > today_yday:
+            year -= 1
+        return datetime.date(year, month, day)
+
+
+def reset_parse_caches(setting, **kwargs):
+    if setting.startswith(settings.PREFIX):
+        ApproximateDateFormField.parse_cache.resize(settings.PARSE_CACHE_SIZE)
+        PrettyDateField.parse_cache.resize(settings.PARSE_CACHE_SIZE)
+
+
+setting_changed.connect(reset_parse_caches)
+instrumentation.configure()
@@ -0,0 +1,77 @@
+"""django.utils.dateformat.format(), with each format string split up only
+once per language.
+
+The specifiers this package's default formats use are worked out directly,
+with month names looked up once in the language they are compiled for; any
+other specifier is passed to dateformat.format() on its own, so the output
+is always the same as formatting the whole string with it.
+"""
+import datetime
+
+from django.utils import dateformat
+from django.utils.dates import MONTHS, MONTHS_3, MONTHS_ALT, MONTHS_AP
+from django.utils.translation import get_language
+
+from .core import NUMERIC_SPECIFIERS
+
+
+def _month_names(months, transform=None):
+    names = dict((month, u'%s' % name) for month, name in months.items())
+    if transform:
+        names = dict((month, transform(name)) for month, name in names.items())
+    return names.__getitem__
+
+
+def _specifiers():
+    """Functions of a date for the specifiers handled directly, using the
+       active language's month names."""
+    if dateformat.format(datetime.date(1, 1, 1), 'Y') == '0001':
+        year_format = '%04d'
+    else:
+        year_format = '%d'
+    month_name = _month_names(MONTHS)
+    month_3 = _month_names(MONTHS_3)
+    month_3_title = _month_names(MONTHS_3, lambda name: name.title())
+    month_alt = _month_names(MONTHS_ALT)
+    month_ap = _month_names(MONTHS_AP)
+    return dict(NUMERIC_SPECIFIERS, **{
+        'F': lambda value: month_name(value.month),
+        'M': lambda value: month_3_title(value.month),
+        'b': lambda value: month_3(value.month),
+        'E': lambda value: month_alt(value.month),
+        'N': lambda value: month_ap(value.month),
+        'Y': lambda value: year_format % value.year,
+    })
+
+
+def _fallback(specifier):
+    return lambda value: dateformat.format(value, specifier)
+
+
+def compile_format(format_string):
+    """A function rendering a date with format_string in the active language."""
+    specifiers = _specifiers()
+    pieces = []
+    for i, piece in enumerate(dateformat.re_formatchars.split(u'%s' % format_string)):
+        if i % 2:
+            pieces.append(specifiers.get(piece) or _fallback(piece))
+        elif piece:
+            literal = dateformat.re_escaped.sub(r'\1', piece)
+            pieces.append(lambda value, literal=literal: literal)
+
+    def render(value):
+        return ''.join([piece(value) for piece in pieces])
+    return render
+
+
+_formatters = {}
+
+
+def format_date(value, format_string):
+    """The same as dateformat.format(value, format_string)."""
+    language = get_language()
+    try:
+        formatter = _formatters[format_string, language]
+    except KeyError:
+        formatter = _formatters.setdefault((format_string, language), compile_format(format_string))
+    return formatter(value)
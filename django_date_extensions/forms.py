@@ -0,0 +1,52 @@
+"""Formset support for cleaning many approximate and pretty dates at once."""
+import datetime
+
+from .fields import BatchCleaning
+
+
+class ApproximateDateFormSetMixin(object):
+    """A mixin for formsets with many forms, e.g.
+
+           class EventFormSet(ApproximateDateFormSetMixin, BaseModelFormSet):
+               pass
+
+       Before the forms are cleaned, the values of each ApproximateDateFormField
+       and PrettyDateField across every form are converted together, each
+       distinct value once, and all relative to the one day clock() gives.
+       Each form's own field then checks required and its validators, and
+       takes its result from those, with the same errors it would have got
+       by cleaning the value itself.
+
+       Values are converted together for fields of the same name, class
+       and, for PrettyDateField, future setting."""
+
+    def clock(self):
+        """The day to take dates without a year as relative to."""
+        return datetime.date.today()
+
+    def full_clean(self):
+        if self.is_bound:
+            self.prefetch_dates()
+        super(ApproximateDateFormSetMixin, self).full_clean()
+
+    def prefetch_dates(self):
+        today = self.clock()
+        fields = {}
+        for form in self.forms:
+            for name, field in form.fields.items():
+                if isinstance(field, BatchCleaning) and not field.disabled:
+                    key = (name, type(field), getattr(field, 'future', None))
+                    fields.setdefault(key, []).append((form, field))
+        for (name, cls, future), pairs in fields.items():
+            values = [
+                field.widget.value_from_datadict(form.data, form.files, form.add_prefix(name))
+                for form, field in pairs
+            ]
+            prefetched = {}
+            for value, result in zip(values, pairs[0][1].convert_many(values, today)):
+                try:
+                    prefetched[value] = result
+                except TypeError:
+                    pass
+            for form, field in pairs:
+                field.prefetched = prefetched
@@ -0,0 +1,40 @@
+"""Database functions for ApproximateDateField.
+
+ApproxYear, ApproxMonth, ApproxPrecision, ApproxEarliest and ApproxLatest
+are also transforms on the field (start__year, start__month and so on), but
+can be used directly to annotate, group or index by, e.g.
+
+    Event.objects.values(year=ApproxYear('start')).annotate(n=Count('pk'))
+"""
+from django.db import models
+
+from .fields import FUTURE_SORT_KEY, PAST_SORT_KEY
+from .lookups import (  # noqa: F401
+    DATED_MAX, DATED_MIN, ApproxEarliest, ApproxLatest, ApproxMonth, ApproxPrecision, ApproxYear,
+)
+
+
+class ApproximateDateOrder(models.Func):
+    """An ApproximateDateField value as the integer ApproximateDate.sort_key()
+       would give it, or NULL if empty, so that the database orders values
+       the same way sorted() does, e.g.
+
+           Event.objects.order_by(ApproximateDateOrder('start'), 'pk')
+
+       It can be annotated and filtered on for keyset pagination, using the
+       sort_key() of the last value seen, or used in a window's order_by."""
+    arity = 1
+
+    def __init__(self, expression, **extra):
+        super(ApproximateDateOrder, self).__init__(expression, output_field=models.IntegerField(), **extra)
+
+    def as_sql(self, compiler, connection, **extra_context):
+        lhs, params = compiler.compile(self.source_expressions[0])
+        params = list(params)
+        sql = (
+            "CASE WHEN %(lhs)s = %%s THEN %(past)d "
+            "WHEN %(lhs)s = %%s THEN %(future)d "
+            "WHEN %(lhs)s >= %%s AND %(lhs)s <= %%s THEN CAST(REPLACE(%(lhs)s, %%s, %%s) AS INTEGER) END"
+        ) % {'lhs': lhs, 'past': PAST_SORT_KEY, 'future': FUTURE_SORT_KEY}
+        return sql, (params + ['past'] + params + ['future'] + params + [DATED_MIN] + params + [DATED_MAX]
+                     + params + ['-', ''])
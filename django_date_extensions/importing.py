@@ -0,0 +1,148 @@
+"""Bulk loading of rows with free-text approximate dates from CSV or JSON
+Lines files.
+
+Rows are streamed through a pipeline of generators - read, parse, then
+saved with bulk_create() a batch at a time - so only one batch is ever in
+memory, however large the file. Rows that cannot be parsed are written to
+a reject file, with the reason, rather than stopping the import.
+
+Reading and writing files needs Python 3, whose csv module works with text
+rather than bytes; import_rows() works on Python 2 too.
+"""
+import collections
+import csv
+import io
+import itertools
+import json
+import sys
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+
+from .fields import ApproximateDateFormField
+
+ImportResult = collections.namedtuple('ImportResult', 'imported rejected')
+
+FORMATS = ('csv', 'jsonl')
+
+
+def guess_format(path):
+    """'jsonl' for .jsonl or .ndjson files, otherwise 'csv'."""
+    return 'jsonl' if path.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+def read_rows(f, format='csv'):
+    """Yield each row of an open text file as a dict."""
+    if format == 'csv':
+        for row in csv.DictReader(f):
+            yield row
+    elif format == 'jsonl':
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        raise ValueError('Unknown format %r' % format)
+
+
+class RejectWriter(object):
+    """Writes rejected rows, each with an added error column, in the same
+       format as they were read."""
+
+    def __init__(self, f, format='csv'):
+        self.f = f
+        self.format = format
+        self.writer = None
+
+    def write(self, row, error):
+        if self.format == 'jsonl':
+            row = dict(row, error=error)
+            self.f.write(json.dumps(row) + '\n')
+            return
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.f, list(row) + ['error'], extrasaction='ignore')
+            self.writer.writeheader()
+        self.writer.writerow(dict(row, error=error))
+
+
+def date_columns(model):
+    """The names of a model's fields that take approximate dates."""
+    return [
+        field.name for field in model._meta.concrete_fields
+        if field.editable and isinstance(field.formfield(), ApproximateDateFormField)
+    ]
+
+
+def parse_rows(model, rows, columns=None, dates=None):
+    """Yield (row, values, error) for each row: the field values to create
+       an instance of model with, or the reason the row was rejected.
+
+       columns are the fields to fill in, defaulting to every column that
+       is a field of the model; dates are those to parse as approximate
+       dates, defaulting to those whose form field is an
+       ApproximateDateFormField. Other columns are converted with the model
+       field's to_python()."""
+    dates = set(date_columns(model) if dates is None else dates)
+    fields = {}
+    for row in rows:
+        if columns is None:
+            columns = [name for name in row if _field(model, name) is not None]
+        if not fields:
+            for name in columns:
+                field = _field(model, name)
+                if field is None:
+                    raise ValueError('%s has no field %s' % (model._meta.label, name))
+                fields[name] = field.formfield().clean if name in dates else field.to_python
+        values = {}
+        error = None
+        for name in columns:
+            try:
+                values[name] = fields[name](row.get(name))
+            except ValidationError as e:
+                error = '%s: %s' % (name, '; '.join(e.messages))
+                break
+        yield row, values, error
+
+
+def _field(model, name):
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+
+
+def import_rows(model, rows, columns=None, dates=None, batch_size=1000, rejects=None, using='default'):
+    """Parse the given rows as parse_rows() does and save them with
+       bulk_create(), batch_size at a time. Rejected rows are passed to
+       rejects.write(row, error), if given. Returns an ImportResult of the
+       number of rows imported and rejected."""
+    manager = model._default_manager.db_manager(using)
+    imported = rejected = 0
+    parsed = parse_rows(model, rows, columns, dates)
+    while True:
+        chunk = list(itertools.islice(parsed, batch_size))
+        if not chunk:
+            break
+        batch = []
+        for row, values, error in chunk:
+            if error is None:
+                batch.append(model(**values))
+            else:
+                rejected += 1
+                if rejects is not None:
+                    rejects.write(row, error)
+        if batch:
+            manager.bulk_create(batch, batch_size=batch_size)
+            imported += len(batch)
+    return ImportResult(imported, rejected)
+
+
+def import_file(model, path, format=None, rejects_path=None, **kwargs):
+    """import_rows() from the CSV or JSON Lines file at path, writing any
+       rejected rows to rejects_path in the same format."""
+    if sys.version_info[0] < 3:
+        raise NotImplementedError('Importing files needs Python 3.')
+    format = format or guess_format(path)
+    with io.open(path, encoding='utf-8', newline='') as f:
+        if rejects_path is None:
+            return import_rows(model, read_rows(f, format), **kwargs)
+        with io.open(rejects_path, 'w', encoding='utf-8', newline='') as out:
+            return import_rows(model, read_rows(f, format), rejects=RejectWriter(out, format), **kwargs)
@@ -0,0 +1,257 @@
+"""Optional counters and timings for the hot paths of date handling.
+
+With DATE_EXTENSIONS_INSTRUMENTATION = True, these are timed on every call:
+
+    clean           ApproximateDateFormField and PrettyDateField cleaning a value
+    parse           DateParser parsing an input against the input formats
+    from_db_value   decoding a value read from the database
+    get_prep_value  encoding a value to save or query with
+    str             rendering an ApproximateDate with str()
+
+Each call is passed to every sink's record(operation, seconds, failed,
+attempts): failed is whether it raised, e.g. a ValidationError from clean(),
+and attempts, for parse only, is how many formats would have been tried in
+turn to get to the one that matched (or all of them, if none did).
+
+The methods are only wrapped while instrumentation is on, so when it is off
+they are exactly as they would otherwise be and cost nothing extra.
+
+Counts and histograms are kept by a Recorder per process, whose snapshot()
+the approximate_date_stats management command prints. Further sinks can be
+given by dotted path in DATE_EXTENSIONS_INSTRUMENTATION_SINKS or added with
+add_sink(). Like the parse caches, none of this takes a lock, so counts can
+be slightly out if several threads record at once.
+"""
+import bisect
+import functools
+import logging
+import time
+
+from django.core.signals import setting_changed
+from django.utils.module_loading import import_string
+
+from . import settings
+
+try:
+    clock = time.perf_counter
+except AttributeError:
+    clock = time.time
+
+# The upper bounds, in microseconds, of the latency histogram buckets; the
+# last bucket takes everything slower.
+BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+# (operation, class, method) for each method that is timed.
+HOOKS = (
+    ('clean', 'django_date_extensions.fields.BatchCleaning', '_clean'),
+    ('parse', 'django_date_extensions.parsing.DateParser', '_parse'),
+    ('from_db_value', 'django_date_extensions.fields.ApproximateDateField', 'from_db_value'),
+    ('from_db_value', 'django_date_extensions.fields.ApproximateDateField', 'decode_trusted'),
+    ('from_db_value', 'django_date_extensions.fields.ApproximateDateIntegerField', 'from_db_value'),
+    ('get_prep_value', 'django_date_extensions.fields.ApproximateDateField', 'get_prep_value'),
+    ('get_prep_value', 'django_date_extensions.fields.ApproximateDateIntegerField', 'get_prep_value'),
+    ('get_prep_value', 'django_date_extensions.fields.ApproximateDateDateField', 'get_prep_value'),
+    ('str', 'django_date_extensions.fields.ApproximateDate', '__str__'),
+)
+
+
+def _bucket_label(i):
+    if i < len(BUCKETS):
+        return '<=%dus' % BUCKETS[i]
+    return '>%dus' % BUCKETS[-1]
+
+
+class Recorder(object):
+    """A sink that counts calls and failures, and keeps a latency histogram
+       and, for parse, a count of format attempts, per operation."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self._stats = {}
+
+    def record(self, operation, seconds, failed=False, attempts=None):
+        try:
+            stats = self._stats[operation]
+        except KeyError:
+            stats = self._stats.setdefault(operation, {
+                'calls': 0, 'failures': 0, 'seconds': 0.0,
+                'histogram': [0] * (len(BUCKETS) + 1), 'attempts': {},
+            })
+        stats['calls'] += 1
+        stats['seconds'] += seconds
+        if failed:
+            stats['failures'] += 1
+        stats['histogram'][bisect.bisect_left(BUCKETS, seconds * 1e6)] += 1
+        if attempts is not None:
+            stats['attempts'][attempts] = stats['attempts'].get(attempts, 0) + 1
+
+    def snapshot(self):
+        """A dict of the figures for each operation so far, that can be
+           dumped as JSON."""
+        result = {}
+        for operation, stats in list(self._stats.items()):
+            calls = stats['calls']
+            figures = {
+                'calls': calls,
+                'failures': stats['failures'],
+                'failure_rate': stats['failures'] / float(calls) if calls else 0.0,
+                'mean_us': stats['seconds'] * 1e6 / calls if calls else 0.0,
+                'histogram': dict(
+                    (_bucket_label(i), count) for i, count in enumerate(stats['histogram']) if count),
+            }
+            if stats['attempts']:
+                figures['attempts'] = dict((str(n), count) for n, count in sorted(stats['attempts'].items()))
+            result[operation] = figures
+        return result
+
+
+class CallbackSink(object):
+    """Passes each call on to callback(operation, seconds, failed, attempts)."""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def record(self, operation, seconds, failed=False, attempts=None):
+        self.callback(operation, seconds, failed, attempts)
+
+
+class LoggingSink(object):
+    """Logs each call, by default at DEBUG level to the
+       django_date_extensions logger."""
+
+    def __init__(self, logger='django_date_extensions', level=logging.DEBUG):
+        self.logger = logging.getLogger(logger) if isinstance(logger, str) else logger
+        self.level = level
+
+    def record(self, operation, seconds, failed=False, attempts=None):
+        if not self.logger.isEnabledFor(self.level):
+            return
+        self.logger.log(
+            self.level, '%s took %.1fus%s%s', operation, seconds * 1e6,
+            ' and failed' if failed else '', '' if attempts is None else ' (%d attempts)' % attempts)
+
+
+class StatsdSink(object):
+    """Sends each call to a StatsD-style client, which needs incr(name) and
+       timing(name, milliseconds) methods, as the statsd package's has:
+       <prefix>.<operation> timings, <prefix>.<operation>.failures counts,
+       and <prefix>.parse.attempts.<n> counts."""
+
+    def __init__(self, client, prefix='date_extensions'):
+        self.client = client
+        self.prefix = prefix
+
+    def record(self, operation, seconds, failed=False, attempts=None):
+        name = '%s.%s' % (self.prefix, operation)
+        self.client.timing(name, seconds * 1000)
+        if failed:
+            self.client.incr(name + '.failures')
+        if attempts is not None:
+            self.client.incr('%s.attempts.%d' % (name, attempts))
+
+
+recorder = Recorder()
+_sinks = [recorder]
+_configured_sinks = []
+_originals = []
+enabled = False
+
+
+def add_sink(sink):
+    """Pass every call on to sink.record() as well."""
+    _sinks.append(sink)
+
+
+def remove_sink(sink):
+    _sinks.remove(sink)
+
+
+def emit(operation, seconds, failed=False, attempts=None):
+    for sink in _sinks:
+        sink.record(operation, seconds, failed, attempts)
+
+
+def snapshot():
+    """The figures the Recorder has for this process so far."""
+    return recorder.snapshot()
+
+
+def reset():
+    recorder.reset()
+
+
+def _timed(operation, method):
+    @functools.wraps(method)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            result = method(*args, **kwargs)
+        except Exception:
+            emit(operation, clock() - start, True)
+            raise
+        emit(operation, clock() - start)
+        return result
+    return timed
+
+
+def _timed_parse(method):
+    @functools.wraps(method)
+    def timed(self, *args, **kwargs):
+        start = clock()
+        try:
+            result = method(self, *args, **kwargs)
+        except ValueError:
+            emit('parse', clock() - start, True, len(self._state[0]))
+            raise
+        emit('parse', clock() - start, False, result[0].index + 1)
+        return result
+    return timed
+
+
+def enable():
+    """Start timing the hot paths."""
+    global enabled
+    if enabled:
+        return
+    for operation, path, name in HOOKS:
+        cls = import_string(path)
+        method = cls.__dict__[name]
+        _originals.append((cls, name, method))
+        setattr(cls, name, _timed_parse(method) if operation == 'parse' else _timed(operation, method))
+    enabled = True
+
+
+def disable():
+    """Put the hot paths back as they were."""
+    global enabled
+    while _originals:
+        cls, name, method = _originals.pop()
+        setattr(cls, name, method)
+    enabled = False
+
+
+def configure():
+    """Turn instrumentation on or off, and set up the sinks, as the
+       settings say."""
+    for sink in _configured_sinks:
+        remove_sink(sink)
+    del _configured_sinks[:]
+    for sink in settings.INSTRUMENTATION_SINKS:
+        if isinstance(sink, str):
+            sink = import_string(sink)()
+        _configured_sinks.append(sink)
+        add_sink(sink)
+    if settings.INSTRUMENTATION:
+        enable()
+    else:
+        disable()
+
+
+def reconfigure(setting, **kwargs):
+    if setting in (settings.PREFIX + 'INSTRUMENTATION', settings.PREFIX + 'INSTRUMENTATION_SINKS'):
+        configure()
+
+
+setting_changed.connect(reconfigure)
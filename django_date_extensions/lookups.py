@@ -0,0 +1,369 @@
+"""Lookups and transforms for ApproximateDateField that work in SQL.
+
+The field stores dates as YYYY-MM-DD strings, with 00 for an unknown month
+or day, which sort the same way as ApproximateDates do. Only 'past' and
+'future' are out of place, sorting after all dates, so each comparison
+picks out the dated values with a range on the column (which an index can
+be used for), and adds past or future separately.
+"""
+import calendar
+
+from django.db import models
+from django.db.models import lookups
+
+# Every stored date lies between these, and past, future and '' do not.
+DATED_MIN = '0000'
+DATED_MAX = '9999-99-99'
+
+# The days past and future are taken to be, as ApproximateDate does.
+FIRST_DAY = '0001-01-01'
+LAST_DAY = '9999-12-31'
+
+
+def _dated(lhs, lhs_params):
+    """SQL for whether a stored value is a date."""
+    return '%s >= %%s AND %s <= %%s' % (lhs, lhs), lhs_params + [DATED_MIN] + lhs_params + [DATED_MAX]
+
+
+def _ordered_sql(lhs, lhs_params, past, low, high, future):
+    """SQL for the stored values that are past (if past is True), future
+       (if future is True) or dated and within low and high, each of which
+       is an (operator, value) pair or None for no bound. If both are None
+       too, no dated values are included."""
+    clauses = []
+    params = []
+    if past:
+        clauses.append('%s = %%s' % lhs)
+        params.extend(lhs_params + ['past'])
+    if low or high:
+        low = low or ('>=', DATED_MIN)
+        high = high or ('<=', DATED_MAX)
+        clauses.append('%s %s %%s AND %s %s %%s' % (lhs, low[0], lhs, high[0]))
+        params.extend(lhs_params + [low[1]] + lhs_params + [high[1]])
+    if future:
+        clauses.append('%s = %%s' % lhs)
+        params.extend(lhs_params + ['future'])
+    if not clauses:
+        return '0 = 1', []
+    return '(%s)' % ' OR '.join('(%s)' % clause for clause in clauses), params
+
+
+def _bounds(lookup_name, value):
+    """The (past, low, high, future) arguments to _ordered_sql for the
+       stored values that compare to value as lookup_name says."""
+    if value == 'past':
+        if lookup_name in ('gt', 'gte'):
+            return lookup_name == 'gte', ('>=', DATED_MIN), None, True
+        return lookup_name == 'lte', None, None, False
+    if value == 'future':
+        if lookup_name in ('lt', 'lte'):
+            return True, ('>=', DATED_MIN), None, lookup_name == 'lte'
+        return False, None, None, lookup_name == 'gte'
+    operator = {'lt': '<', 'lte': '<=', 'gt': '>', 'gte': '>='}[lookup_name]
+    if lookup_name in ('lt', 'lte'):
+        return True, None, (operator, value), False
+    return False, (operator, value), None, True
+
+
+class ApproximateComparison(object):
+    """Compares in the same order as ApproximateDate: past, then dates,
+       then future. Empty values match nothing."""
+
+    def as_sql(self, compiler, connection):
+        if not self.rhs_is_direct_value() or not self.rhs:
+            return super(ApproximateComparison, self).as_sql(compiler, connection)
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        return _ordered_sql(lhs_sql, list(lhs_params), *_bounds(self.lookup_name, self.rhs))
+
+
+class ApproximateLessThan(ApproximateComparison, lookups.LessThan):
+    pass
+
+
+class ApproximateLessThanOrEqual(ApproximateComparison, lookups.LessThanOrEqual):
+    pass
+
+
+class ApproximateGreaterThan(ApproximateComparison, lookups.GreaterThan):
+    pass
+
+
+class ApproximateGreaterThanOrEqual(ApproximateComparison, lookups.GreaterThanOrEqual):
+    pass
+
+
+class ApproximateRange(models.Lookup):
+    """Values from the first ApproximateDate to the second, inclusive."""
+    lookup_name = 'approx_range'
+
+    def get_prep_lookup(self):
+        field = self.lhs.output_field
+        return [field.get_prep_value(value) for value in self.rhs]
+
+    def as_sql(self, compiler, connection):
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        lhs_params = list(lhs_params)
+        start, end = self.rhs
+        low_past, low, _, low_future = _bounds('gte', start)
+        high_past, _, high, high_future = _bounds('lte', end)
+        if (low_past or low) and (high_future or high):
+            low = low or ('>=', DATED_MIN)
+            high = high or ('<=', DATED_MAX)
+        else:
+            low = high = None
+        return _ordered_sql(lhs_sql, lhs_params, low_past and high_past, low, high, low_future and high_future)
+
+
+class ApproxYear(models.Transform):
+    """The year of a dated value, or NULL for past, future or empty."""
+    lookup_name = 'year'
+
+    @property
+    def output_field(self):
+        return models.IntegerField()
+
+    def as_sql(self, compiler, connection):
+        lhs, params = compiler.compile(self.lhs)
+        params = list(params)
+        dated, dated_params = _dated(lhs, params)
+        sql = 'CASE WHEN %s THEN CAST(SUBSTR(%s, 1, 4) AS INTEGER) END' % (dated, lhs)
+        return sql, dated_params + params
+
+
+class ApproxYearComparison(object):
+    """Compares a whole year by a range on the stored string, so an index
+       on the column can be used."""
+
+    def as_sql(self, compiler, connection):
+        if not self.rhs_is_direct_value():
+            return super(ApproxYearComparison, self).as_sql(compiler, connection)
+        lhs_sql, lhs_params = compiler.compile(self.lhs.lhs)
+        first, last = '%04d-00-00' % self.rhs, '%04d-99-99' % self.rhs
+        low, high = {
+            'exact': (('>=', first), ('<=', last)),
+            'gt': (('>', last), None),
+            'gte': (('>=', first), None),
+            'lt': (None, ('<', first)),
+            'lte': (None, ('<=', last)),
+        }[self.lookup_name]
+        return _ordered_sql(lhs_sql, list(lhs_params), False, low, high, False)
+
+
+class ApproxYearExact(ApproxYearComparison, lookups.Exact):
+    pass
+
+
+class ApproxYearGreaterThan(ApproxYearComparison, lookups.GreaterThan):
+    pass
+
+
+class ApproxYearGreaterThanOrEqual(ApproxYearComparison, lookups.GreaterThanOrEqual):
+    pass
+
+
+class ApproxYearLessThan(ApproxYearComparison, lookups.LessThan):
+    pass
+
+
+class ApproxYearLessThanOrEqual(ApproxYearComparison, lookups.LessThanOrEqual):
+    pass
+
+
+ApproxYear.register_lookup(ApproxYearExact)
+ApproxYear.register_lookup(ApproxYearGreaterThan)
+ApproxYear.register_lookup(ApproxYearGreaterThanOrEqual)
+ApproxYear.register_lookup(ApproxYearLessThan)
+ApproxYear.register_lookup(ApproxYearLessThanOrEqual)
+
+
+class ApproxPrecision(models.Transform):
+    """How precise a value is: 'day', 'month' or 'year' for dated values,
+       'past' or 'future' for those, and NULL for empty ones, just as
+       ApproximateDate.precision."""
+    lookup_name = 'precision'
+
+    @property
+    def output_field(self):
+        return models.CharField(max_length=6)
+
+    def as_sql(self, compiler, connection):
+        lhs, params = compiler.compile(self.lhs)
+        params = list(params)
+        dated, dated_params = _dated(lhs, params)
+        sql = (
+            "CASE WHEN %(lhs)s IN ('past', 'future') THEN %(lhs)s "
+            "WHEN %(dated)s THEN CASE "
+            "WHEN SUBSTR(%(lhs)s, 9, 2) <> '00' THEN 'day' "
+            "WHEN SUBSTR(%(lhs)s, 6, 2) <> '00' THEN 'month' "
+            "ELSE 'year' END END"
+        ) % {'lhs': lhs, 'dated': dated}
+        return sql, params * 2 + dated_params + params * 2
+
+
+class ApproxMonth(models.Transform):
+    """The month of a value with one, or NULL for year-only values, past,
+       future or empty."""
+    lookup_name = 'month'
+
+    @property
+    def output_field(self):
+        return models.IntegerField()
+
+    def as_sql(self, compiler, connection):
+        lhs, params = compiler.compile(self.lhs)
+        params = list(params)
+        dated, dated_params = _dated(lhs, params)
+        sql = "CASE WHEN %s AND SUBSTR(%s, 6, 2) <> '00' THEN CAST(SUBSTR(%s, 6, 2) AS INTEGER) END" % (
+            dated, lhs, lhs)
+        return sql, dated_params + params * 2
+
+
+class ApproxDay(models.Transform):
+    """A day a value could be, as a date, or NULL for empty values.
+
+       Subclasses give day_sql(), SQL for the day as a YYYY-MM-DD string,
+       which is converted to a date in a way that can be indexed: on
+       PostgreSQL with make_date(), which unlike a cast is immutable, and
+       on SQLite, which has no date type, not at all."""
+
+    @property
+    def output_field(self):
+        return models.DateField()
+
+    def as_sql(self, compiler, connection):
+        sql, params = self.day_sql(compiler)
+        return 'CAST(%s AS DATE)' % sql, params
+
+    def as_sqlite(self, compiler, connection):
+        return self.day_sql(compiler)
+
+    def as_postgresql(self, compiler, connection):
+        sql, params = self.day_sql(compiler)
+        parts = ', '.join('CAST(SUBSTR(%s, %d, %d) AS INTEGER)' % (sql, start, length)
+                          for start, length in ((1, 4), (6, 2), (9, 2)))
+        return 'make_date(%s)' % parts, params * 3
+
+    def day_sql(self, compiler):
+        raise NotImplementedError
+
+
+class ApproxEarliest(ApproxDay):
+    """The first day a value could be, just as ApproximateDate.earliest()."""
+    lookup_name = 'earliest'
+
+    def day_sql(self, compiler):
+        lhs, params = compiler.compile(self.lhs)
+        params = list(params)
+        dated, dated_params = _dated(lhs, params)
+        sql = (
+            "CASE WHEN %(lhs)s = 'past' THEN '%(first)s' "
+            "WHEN %(lhs)s = 'future' THEN '%(last)s' "
+            "WHEN %(dated)s THEN REPLACE(%(lhs)s, '-00', '-01') END"
+        ) % {'lhs': lhs, 'dated': dated, 'first': FIRST_DAY, 'last': LAST_DAY}
+        return sql, params * 2 + dated_params + params
+
+
+class ApproxLatest(ApproxDay):
+    """The last day a value could be, just as ApproximateDate.latest()."""
+    lookup_name = 'latest'
+
+    def day_sql(self, compiler):
+        lhs, params = compiler.compile(self.lhs)
+        params = list(params)
+        dated, dated_params = _dated(lhs, params)
+        year = 'CAST(SUBSTR(%s, 1, 4) AS INTEGER)' % lhs
+        # Integer division rather than a modulo, which would need escaping.
+        leap = '(%(y)s = %(y)s / 4 * 4 AND (%(y)s <> %(y)s / 100 * 100 OR %(y)s = %(y)s / 400 * 400))' % {'y': year}
+        sql = (
+            "CASE WHEN %(lhs)s = 'past' THEN '%(first)s' "
+            "WHEN %(lhs)s = 'future' THEN '%(last)s' "
+            "WHEN %(dated)s THEN CASE "
+            "WHEN SUBSTR(%(lhs)s, 6, 2) = '00' THEN SUBSTR(%(lhs)s, 1, 4) || '-12-31' "
+            "WHEN SUBSTR(%(lhs)s, 9, 2) = '00' THEN SUBSTR(%(lhs)s, 1, 8) || CASE SUBSTR(%(lhs)s, 6, 2) "
+            "WHEN '02' THEN CASE WHEN %(leap)s THEN '29' ELSE '28' END "
+            "WHEN '04' THEN '30' WHEN '06' THEN '30' WHEN '09' THEN '30' WHEN '11' THEN '30' "
+            "ELSE '31' END "
+            "ELSE %(lhs)s END END"
+        ) % {'lhs': lhs, 'dated': dated, 'leap': leap, 'first': FIRST_DAY, 'last': LAST_DAY}
+        return sql, params * 2 + dated_params + params * 5 + params * 6 + params
+
+
+def _span(value):
+    """The first and last days, as YYYY-MM-DD, that a stored value could be,
+       just as ApproximateDate.earliest() and latest()."""
+    if value == 'past':
+        return FIRST_DAY, FIRST_DAY
+    if value == 'future':
+        return LAST_DAY, LAST_DAY
+    year, month, day = map(int, value.split('-'))
+    if day:
+        first = last = '%04d-%02d-%02d' % (year, month, day)
+    elif month:
+        first = '%04d-%02d-01' % (year, month)
+        last = '%04d-%02d-%02d' % (year, month, calendar.monthrange(year, month)[1])
+    else:
+        first, last = '%04d-01-01' % year, '%04d-12-31' % year
+    return first, last
+
+
+def _latest_sql(lhs):
+    """SQL for the stored value with unknown months and days as 99, which
+       compares with YYYY-MM-DD strings as the last day it could be does."""
+    return "REPLACE(%s, '-00', '-99')" % lhs
+
+
+class Overlaps(models.Lookup):
+    """Values that could be the same day as an ApproximateDate or date, or
+       as any day from the start of one to the end of another, given as a
+       pair. Empty values match nothing."""
+    lookup_name = 'overlaps'
+
+    def get_prep_lookup(self):
+        field = self.lhs.output_field
+        if isinstance(self.rhs, (list, tuple)):
+            start, end = self.rhs
+        else:
+            start = end = self.rhs
+        start, end = field.get_prep_value(start), field.get_prep_value(end)
+        if not start or not end:
+            return None
+        return _span(start)[0], _span(end)[1]
+
+    def as_sql(self, compiler, connection):
+        if self.rhs is None:
+            return '0 = 1', []
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        lhs_params = list(lhs_params)
+        first, last = self.rhs
+        # The range on the column itself can use an index.
+        clauses = ['%s >= %%s AND %s <= %%s AND %s >= %%s' % (lhs_sql, lhs_sql, _latest_sql(lhs_sql))]
+        params = lhs_params + [first[:4] + '-00-00'] + lhs_params + [last] + lhs_params + [first]
+        if first == FIRST_DAY:
+            clauses.append('%s = %%s' % lhs_sql)
+            params.extend(lhs_params + ['past'])
+        if last == LAST_DAY:
+            clauses.append('%s = %%s' % lhs_sql)
+            params.extend(lhs_params + ['future'])
+        return '(%s)' % ' OR '.join('(%s)' % clause for clause in clauses), params
+
+
+class CertainlyBefore(models.Lookup):
+    """Values that must be before an ApproximateDate or date, whichever days
+       within them they turn out to be. Empty values match nothing."""
+    lookup_name = 'certainly_before'
+
+    def get_prep_lookup(self):
+        value = self.lhs.output_field.get_prep_value(self.rhs)
+        return _span(value)[0] if value else None
+
+    def as_sql(self, compiler, connection):
+        if self.rhs is None:
+            return '0 = 1', []
+        lhs_sql, lhs_params = self.process_lhs(compiler, connection)
+        lhs_params = list(lhs_params)
+        clauses = ['%s >= %%s AND %s < %%s AND %s < %%s' % (lhs_sql, lhs_sql, _latest_sql(lhs_sql))]
+        params = lhs_params + [DATED_MIN] + lhs_params + [self.rhs] + lhs_params + [self.rhs]
+        if self.rhs > FIRST_DAY:
+            clauses.append('%s = %%s' % lhs_sql)
+            params.extend(lhs_params + ['past'])
+        return '(%s)' % ' OR '.join('(%s)' % clause for clause in clauses), params
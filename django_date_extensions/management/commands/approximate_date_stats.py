@@ -0,0 +1,45 @@
+"""Print the instrumentation figures for this process as JSON, optionally
+after cleaning every line of a file with ApproximateDateFormField, to see
+how inputs like them are parsed."""
+import io
+import json
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+
+from django_date_extensions import instrumentation
+from django_date_extensions.fields import ApproximateDateFormField
+
+
+class Command(BaseCommand):
+    help = 'Prints a snapshot of the approximate date instrumentation figures as JSON.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parse', metavar='PATH',
+                            help='Clean each line of this file first, with instrumentation on.')
+        parser.add_argument('--reset', action='store_true', help='Clear the figures after printing them.')
+
+    def handle(self, *args, **options):
+        if options['parse']:
+            was_enabled = instrumentation.enabled
+            instrumentation.enable()
+            try:
+                self.parse(options['parse'])
+            finally:
+                if not was_enabled:
+                    instrumentation.disable()
+        self.stdout.write(json.dumps(instrumentation.snapshot(), indent=2, sort_keys=True))
+        if options['reset']:
+            instrumentation.reset()
+
+    def parse(self, path):
+        clean = ApproximateDateFormField(required=False).clean
+        try:
+            with io.open(path, encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        clean(line.strip())
+                    except ValidationError:
+                        pass
+        except IOError as e:
+            raise CommandError(str(e))
@@ -0,0 +1,43 @@
+"""Load rows with free-text approximate dates from a CSV or JSON Lines file
+into a model, a batch at a time, writing rows that cannot be parsed to a
+reject file."""
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+
+from django_date_extensions.importing import FORMATS, import_file
+
+
+def _names(value):
+    return [name.strip() for name in value.split(',') if name.strip()] if value else None
+
+
+class Command(BaseCommand):
+    help = 'Imports a CSV or JSON Lines file into a model, parsing approximate dates.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='The model, as app_label.ModelName.')
+        parser.add_argument('path', help='The file to import.')
+        parser.add_argument('--format', choices=FORMATS, help='The file format, if not clear from its name.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk_create().')
+        parser.add_argument('--rejects', help='File to write rejected rows to, with the reason.')
+        parser.add_argument('--columns', help='Comma-separated fields to fill in; defaults to all that match.')
+        parser.add_argument('--dates', help='Comma-separated fields to parse as approximate dates; '
+                                            'defaults to all approximate date fields.')
+        parser.add_argument('--database', default='default', help='The database to use.')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        if options['batch_size'] < 1:
+            raise CommandError('The batch size must be at least 1.')
+        try:
+            result = import_file(
+                model, options['path'], format=options['format'], rejects_path=options['rejects'],
+                columns=_names(options['columns']), dates=_names(options['dates']),
+                batch_size=options['batch_size'], using=options['database'],
+            )
+        except (IOError, NotImplementedError, ValueError) as e:
+            raise CommandError(str(e))
+        self.stdout.write('Imported %d rows, rejected %d.' % result)
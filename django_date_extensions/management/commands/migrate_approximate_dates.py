@@ -0,0 +1,116 @@
+"""Copy the values of an ApproximateDateField into an ApproximateDateDateField
+on the same model, a batch of rows at a time.
+
+Rows are read in primary key order from the last one copied, rather than
+with OFFSET, and each batch is written in its own short transaction, so
+the table is never locked for long. After each batch the last primary key
+copied is saved to the checkpoint file, and a later run with the same
+arguments carries on from there.
+
+Rows whose source value isn't a valid stored approximate date are reported
+by primary key and left as they are.
+"""
+import json
+import os
+
+from django.apps import apps
+from django import VERSION as DJANGO_VERSION
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from django_date_extensions.fields import ApproximateDateDateField, ApproximateDateField, decode
+
+
+class Command(BaseCommand):
+    help = 'Copies an ApproximateDateField into an ApproximateDateDateField in batches, resumably.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('model', help='The model, as app_label.ModelName.')
+        parser.add_argument('source', help='The ApproximateDateField to copy from.')
+        parser.add_argument('target', help='The ApproximateDateDateField to copy to.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per batch.')
+        parser.add_argument(
+            '--checkpoint', help='File to save progress to, and carry on from if it exists. '
+            'Defaults to migrate_approximate_dates.<model>.<target>.json in the current directory.')
+        parser.add_argument('--restart', action='store_true', help='Ignore any saved progress.')
+        parser.add_argument('--database', default='default', help='The database to use.')
+
+    def handle(self, *args, **options):
+        try:
+            model = apps.get_model(options['model'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+        source = self.get_field(model, options['source'], ApproximateDateField)
+        target = self.get_field(model, options['target'], ApproximateDateDateField)
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('The batch size must be at least 1.')
+
+        checkpoint = options['checkpoint'] or 'migrate_approximate_dates.%s.%s.json' % (
+            model._meta.label_lower, target.name)
+        job = {'model': model._meta.label_lower, 'source': source.name, 'target': target.name}
+        last_pk = None
+        if not options['restart'] and os.path.exists(checkpoint):
+            with open(checkpoint) as f:
+                saved = json.load(f)
+            if dict((key, saved.get(key)) for key in job) != job:
+                raise CommandError('%s is a checkpoint for a different migration.' % checkpoint)
+            last_pk = saved['last_pk']
+            self.stdout.write('Carrying on after primary key %r.' % (last_pk,))
+
+        queryset = model._default_manager.using(options['database']).order_by('pk')
+        # The stored strings, to validate each in turn, rather than have the
+        # field's converter raise for the first invalid one.
+        stored = models.ExpressionWrapper(models.F(source.attname), output_field=models.CharField())
+        fields = [target.name, target.precision_name]
+        copied = invalid = 0
+        while True:
+            batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            rows = list(batch.annotate(approximate_date_stored=stored).values_list(
+                'pk', 'approximate_date_stored')[:batch_size])
+            if not rows:
+                break
+            objs = []
+            for pk, value in rows:
+                try:
+                    value = decode(value)
+                except ValidationError as e:
+                    self.stderr.write('Skipped primary key %r: %s' % (pk, ' '.join(e.messages)))
+                    invalid += 1
+                    continue
+                obj = model(pk=pk)
+                setattr(obj, target.name, value)
+                objs.append(obj)
+            with transaction.atomic(using=options['database']):
+                if DJANGO_VERSION >= (2, 2):
+                    queryset.bulk_update(objs, fields)
+                else:
+                    for obj in objs:
+                        obj.save(using=options['database'], update_fields=fields)
+            last_pk = rows[-1][0]
+            copied += len(objs)
+            self.save_checkpoint(checkpoint, dict(job, last_pk=last_pk))
+            if options['verbosity'] > 1:
+                self.stdout.write('Copied %d rows, up to primary key %r.' % (copied, last_pk))
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write('Copied %d rows.' % copied)
+        if invalid:
+            self.stdout.write('Skipped %d rows with invalid values.' % invalid)
+
+    def get_field(self, model, name, field_class):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            raise CommandError('%s has no field %s.' % (model._meta.label, name))
+        if not isinstance(field, field_class):
+            raise CommandError('%s.%s is not an %s.' % (model._meta.label, name, field_class.__name__))
+        return field
+
+    def save_checkpoint(self, path, state):
+        # Write then rename, so an interruption never leaves half a file.
+        with open(path + '.tmp', 'w') as f:
+            json.dump(state, f, default=str)
+        os.rename(path + '.tmp', path)
@@ -0,0 +1,337 @@
+"""A single-pass replacement for looping over time.strptime().
+
+A DateParser compiles an ordered list of strptime-style formats into one
+regular expression, so an input is matched against all of them at once
+instead of raising and catching a ValueError for every format that fails.
+The results are the same as trying each format in turn with time.strptime.
+
+Unlike time.strptime, which takes a global lock and re-reads the locale on
+every call, a DateParser is never changed once built, so any number of
+threads can use it at once. Parsers and month name tables are cached per
+LC_TIME locale; if two threads build the same one at the same time, one
+copy simply wins.
+
+An AdaptiveDateParser also counts which format each input matched, and
+every so often tries the most used formats first. It only ever moves a
+format ahead of another if no input could match both, so every input
+still gives the same result as it would with the formats in order.
+"""
+import calendar
+import datetime
+import locale
+import re
+import time
+
+# The same sub-patterns time.strptime uses for these directives.
+DIRECTIVE_PATTERNS = {
+    'd': r'3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9]',
+    'm': r'1[0-2]|0[1-9]|[1-9]',
+    'y': r'\d\d',
+    'Y': r'\d\d\d\d',
+}
+
+_directive_re = re.compile(r'%(.)|(\s+)|([^%\s]+)|(%)', re.DOTALL)
+
+
+def _month_table(names):
+    """Map lowercased month names to month numbers, plus a regex
+       alternation of them, longest first, as time.strptime does."""
+    table = dict((name.lower(), i) for i, name in enumerate(names) if i)
+    alternation = '|'.join(re.escape(name) for name in sorted(table, key=len, reverse=True))
+    return table, alternation
+
+
+_month_tables = {}
+
+
+def get_month_tables(lang):
+    """The %b and %B month name tables for the given LC_TIME locale,
+       which must be the current one the first time it is asked for."""
+    try:
+        return _month_tables[lang]
+    except KeyError:
+        tables = {
+            'b': _month_table(calendar.month_abbr),
+            'B': _month_table(calendar.month_name),
+        }
+        return _month_tables.setdefault(lang, tables)
+
+
+def current_locale():
+    """The current LC_TIME locale, which month names depend on."""
+    return locale.setlocale(locale.LC_TIME)
+
+
+class _Format(object):
+    """One strptime format, compiled to a regex fragment if possible."""
+
+    def __init__(self, index, format, tag, months, rank=None):
+        self.format = format
+        self.tag = tag
+        # Its position in the order the formats are tried.
+        self.index = index
+        # Its position in the order the formats were given.
+        self.rank = index if rank is None else rank
+        self.fields = []
+        self.fragment = self._compile(index, months)
+
+    def _compile(self, index, months):
+        pieces = []
+        seen = set()
+        for directive, space, literal, stray in _directive_re.findall(self.format):
+            if stray:
+                return None
+            elif space:
+                pieces.append(r'\s+')
+            elif literal:
+                pieces.append(re.escape(literal))
+            elif directive == '%':
+                pieces.append('%')
+            elif directive in DIRECTIVE_PATTERNS or directive in months:
+                # Repeated directives or two ways of giving the month
+                # are left to time.strptime itself.
+                kind = 'm' if directive in months else directive
+                if kind in seen:
+                    return None
+                seen.add(kind)
+                group = 'f%d_%s' % (index, directive)
+                self.fields.append((group, directive))
+                pattern = DIRECTIVE_PATTERNS.get(directive) or months[directive][1]
+                pieces.append('(?P<%s>%s)' % (group, pattern))
+            else:
+                return None
+        return '(?P<f%d>%s)' % (index, ''.join(pieces))
+
+    def convert(self, match, months):
+        year = None
+        month = day = 1
+        for group, directive in self.fields:
+            value = match.group(group)
+            if directive == 'Y':
+                year = int(value)
+            elif directive == 'y':
+                year = int(value)
+                year += 2000 if year <= 68 else 1900
+            elif directive == 'm':
+                month = int(value)
+            elif directive == 'd':
+                day = int(value)
+            else:
+                month = months[directive][0][value.lower()]
+        return _check(year, month, day)
+
+    def strptime(self, value):
+        t = time.strptime(value, self.format)
+        return t[0], t[1], t[2], t[7]
+
+
+def signature(format, months):
+    """The kinds of token, in order, of every input the format can match:
+       'D' for a run of digits, 'A' for a run of letters and any other
+       character as itself, ignoring whitespace. Two formats with different
+       signatures can never match the same input. None if it cannot be
+       worked out, e.g. for month names that are not all letters."""
+    tokens = []
+    for directive, space, literal, stray in _directive_re.findall(format):
+        if stray:
+            return None
+        elif space:
+            tokens.append(' ')
+        elif literal:
+            for char in literal:
+                tokens.append('D' if char.isdigit() else 'A' if char.isalpha() else char)
+        elif directive == '%':
+            tokens.append('%')
+        elif directive in DIRECTIVE_PATTERNS:
+            # %d can match a space and a digit, which would split a run of
+            # digits it follows.
+            if directive == 'd' and tokens and tokens[-1] == 'D':
+                return None
+            tokens.append('D')
+        elif directive in months:
+            if not all(name.isalpha() for name in months[directive][0]):
+                return None
+            tokens.append('A')
+        else:
+            return None
+    merged = []
+    for token in tokens:
+        if token in ('D', 'A') and merged and merged[-1] == token:
+            continue
+        merged.append(token)
+    return tuple(token for token in merged if token != ' ')
+
+
+def _check(year, month, day):
+    """Fill in defaults and validate the date the way time.strptime does,
+       returning (year, month, day, day of year)."""
+    if year is None:
+        # February 29th needs a leap year to be valid, but is still
+        # reported as 1900, just with the leap year's day of the year.
+        check_year = 1904 if (month, day) == (2, 29) else 1900
+        year = 1900
+    else:
+        check_year = year
+    yday = datetime.date(check_year, month, day).timetuple()[7]
+    return year, month, day, yday
+
+
+# A combined regex that has not been compiled yet.
+_UNCOMPILED = object()
+
+
+class DateParser(object):
+    """Parses strings against groups of formats, given as a sequence of
+       (tag, formats) pairs and tried in order.
+
+       parse() calls convert(tag, year, month, day, yday) for the first
+       format that matches, just as a loop of time.strptime() calls would,
+       moving on to the next format if convert raises ValueError.
+
+       Month names are those of the given LC_TIME locale, defaulting to
+       the current one."""
+
+    def __init__(self, groups, lang=None):
+        self.given = [(tag, f) for tag, group in groups for f in group]
+        self.months = get_month_tables(current_locale() if lang is None else lang)
+        self._state = self._build(range(len(self.given)))
+
+    def _build(self, order):
+        """The formats in the given order of their positions in self.given,
+           and a list to hold, for each position, a combined regex of it and
+           the following formats up to the next one that needs time.strptime
+           itself, each compiled when first needed."""
+        formats = []
+        for i, rank in enumerate(order):
+            tag, f = self.given[rank]
+            formats.append(_Format(i, f, tag, self.months, rank))
+        return formats, [_UNCOMPILED] * len(formats)
+
+    @staticmethod
+    def _combine(formats, i):
+        fragments = []
+        for following in formats[i:]:
+            if following.fragment is None:
+                break
+            fragments.append(following.fragment)
+        return re.compile('|'.join(fragments), re.IGNORECASE) if fragments else None
+
+    def order(self):
+        """The (tag, format) pairs in the order they are tried."""
+        return [(fmt.tag, fmt.format) for fmt in self._state[0]]
+
+    def parse(self, value, convert):
+        return self._parse(value, convert)[1]
+
+    def _parse(self, value, convert):
+        """The format that matched value and the result of convert()."""
+        formats, combined_regexes = self._state
+        i = 0
+        count = len(formats)
+        while i < count:
+            combined = combined_regexes[i]
+            if combined is _UNCOMPILED:
+                combined = combined_regexes[i] = self._combine(formats, i)
+            if combined is None:
+                fmt = formats[i]
+                try:
+                    return fmt, convert(fmt.tag, *fmt.strptime(value))
+                except ValueError:
+                    i += 1
+                    continue
+
+            match = combined.match(value)
+            if match is None:
+                # Skip over everything this regex covered.
+                while i < count and formats[i].fragment is not None:
+                    i += 1
+                continue
+
+            i = int(match.lastgroup[1:])
+            fmt = formats[i]
+            i += 1
+            if match.end() != len(value):
+                continue
+            try:
+                return fmt, convert(fmt.tag, *fmt.convert(match, self.months))
+            except ValueError:
+                continue
+        raise ValueError('%r does not match any format' % value)
+
+
+class AdaptiveDateParser(DateParser):
+    """A DateParser that counts which format each input matched and, every
+       interval inputs, tries the formats in order of how often they have
+       matched, as far as it can without changing any result: a format is
+       only moved ahead of another if both have signatures and they differ.
+
+       Counts are kept without a lock, so are approximate if several
+       threads parse at once, which can only affect the order."""
+
+    def __init__(self, groups, lang=None, interval=1000):
+        super(AdaptiveDateParser, self).__init__(groups, lang)
+        self.interval = interval
+        self.counts = [0] * len(self.given)
+        self.calls = 0
+        signatures = [signature(f, self.months) for tag, f in self.given]
+        # For each format, the earlier ones that must stay ahead of it; one
+        # without a signature could clash with any of them.
+        self.after = [
+            set(range(j)) if signatures[j] is None else
+            set(i for i in range(j) if signatures[i] is None or signatures[i] == signatures[j])
+            for j in range(len(self.given))
+        ]
+
+    def parse(self, value, convert):
+        fmt, result = self._parse(value, convert)
+        self.counts[fmt.rank] += 1
+        self.calls += 1
+        if self.calls % self.interval == 0:
+            self.reorder()
+        return result
+
+    def hits(self):
+        """How many inputs each (tag, format) pair has matched."""
+        return dict(zip(self.given, self.counts))
+
+    def reorder(self):
+        """Try the formats that have matched most first, where allowed."""
+        # A format that must stay ahead of a popular one is as urgent as it.
+        counts = list(self.counts)
+        for j in reversed(range(len(counts))):
+            for i in self.after[j]:
+                counts[i] = max(counts[i], counts[j])
+        order = []
+        placed = set()
+        remaining = list(range(len(self.given)))
+        while remaining:
+            ready = [j for j in remaining if self.after[j] <= placed]
+            best = min(ready, key=lambda j: (-counts[j], j))
+            order.append(best)
+            placed.add(best)
+            remaining.remove(best)
+        if order != [fmt.rank for fmt in self._state[0]]:
+            self._state = self._build(order)
+
+
+_parsers = {}
+
+
+def get_parser(*groups, **options):
+    """Return a DateParser for the given (tag, formats) groups in the
+       current locale, compiling it only the first time it is needed.
+
+       With adaptive=True, it is an AdaptiveDateParser, reordering every
+       interval (default 1000) inputs."""
+    adaptive = options.get('adaptive', False)
+    interval = options.get('interval', 1000)
+    lang = current_locale()
+    key = (lang, tuple((tag, tuple(formats)) for tag, formats in groups), adaptive and interval)
+    try:
+        return _parsers[key]
+    except KeyError:
+        if adaptive:
+            parser = AdaptiveDateParser(key[1], lang, interval)
+        else:
+            parser = DateParser(key[1], lang)
+        return _parsers.setdefault(key, parser)
@@ -1,15 +1,52 @@
 from datetime import date, datetime
+import copy
+import json
 import os
+import pickle
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+try:
+    import copyreg
+except ImportError:
+    import copy_reg as copyreg
 
-from django.db import models
+from django.db import connection, models
+from django.db.models import F
+from django.db.models.functions import Coalesce
+try:
+    from django.db.models import Window
+    from django.db.models.functions import RowNumber
+except ImportError:
+    # Django < 2.0
+    Window = RowNumber = None
 from django.core import serializers
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
 from django import forms
-from django.test import TestCase, override_settings
+from django.test import SimpleTestCase, TestCase, override_settings
 from django import VERSION as DJANGO_VERSION
+from django.utils import dateformat, translation
 from django.utils.encoding import force_text
 
-from .fields import ApproximateDate, ApproximateDateField
+from . import arrays, batch, codec, core, formatting, importing, instrumentation, parsing, settings as date_settings
+from .arrays import ApproximateDateArray
+from .forms import ApproximateDateFormSetMixin
+from .functions import (
+    ApproxEarliest, ApproximateDateOrder, ApproxLatest, ApproxMonth, ApproxPrecision, ApproxYear,
+)
+from .fields import (
+    ApproximateDate, ApproximateDateDateField, ApproximateDateField, ApproximateDateFormField,
+    PRECISION_MONTH, ApproximateDateIntegerField, PrettyDateField,
+)
 
 os.environ['DJANGO_SETTINGS_MODULE'] = 'example.settings'
 
@@ -22,6 +59,15 @@ class ApproxDateModel(models.Model):
         return u'%s' % str(self.start)
 
 
+class ApproxDateIntegerModel(models.Model):
+    start = ApproximateDateIntegerField(null=True, blank=True)
+
+
+class ApproxDateDateModel(models.Model):
+    old = ApproximateDateField(blank=True)
+    start = ApproximateDateDateField(null=True, blank=True)
+
+
 class ApproxDateForm(forms.ModelForm):
     class Meta:
         model = ApproxDateModel
@@ -46,6 +92,84 @@ class PastAndFuture(unittest.TestCase):
         self.assertEqual(repr(ApproximateDate(past=True)), 'past')
 
 
+class ImmutableDates(unittest.TestCase):
+
+    def test_singletons(self):
+        self.assertIs(ApproximateDate(future=True), ApproximateDate(future=True))
+        self.assertIs(ApproximateDate(past=True), ApproximateDate(past=True))
+        self.assertIs(pickle.loads(pickle.dumps(ApproximateDate(past=True))), ApproximateDate(past=True))
+
+    def test_immutable(self):
+        approx = ApproximateDate(2006, 10)
+        self.assertRaises(AttributeError, setattr, approx, 'year', 2007)
+        self.assertRaises(AttributeError, setattr, approx, 'other', 2007)
+        self.assertIs(copy.deepcopy(approx), approx)
+        self.assertEqual(pickle.loads(pickle.dumps(approx)), approx)
+
+    def test_old_pickles(self):
+        # As pickled by releases before instances had slots, with protocols 0 and 2.
+        old = (
+            b'ccopy_reg\n_reconstructor\np0\n(cdjango_date_extensions.fields\nApproximateDate\np1\nc__builtin__\n'
+            b'object\np2\nNtp3\nRp4\n(dp5\nVfuture\np6\nI00\nsVpast\np7\nI00\nsVyear\np8\nI2006\nsVmonth\n'
+            b'p9\nI10\nsVday\np10\nI0\nsb.'
+        )
+        self.assertEqual(pickle.loads(old), ApproximateDate(2006, 10))
+        old = (
+            b'\x80\x02cdjango_date_extensions.fields\nApproximateDate\nq\x00)\x81q\x01}q\x02(X\x06\x00\x00\x00futureq'
+            b'\x03\x88X\x04\x00\x00\x00pastq\x04\x89X\x04\x00\x00\x00yearq\x05K\x00X\x05\x00\x00\x00monthq\x06K\x00'
+            b'X\x03\x00\x00\x00dayq\x07K\x00ub.'
+        )
+        future = pickle.loads(old)
+        self.assertEqual(future, ApproximateDate(future=True))
+        self.assertTrue(future.future)
+        self.assertEqual(str(future), 'future')
+
+    def test_hash(self):
+        values = set([ApproximateDate(2006, 10), ApproximateDate(2006, 10), ApproximateDate(2006, 10, 25),
+                      ApproximateDate(2006), ApproximateDate(future=True), ApproximateDate(past=True)])
+        self.assertEqual(len(values), 5)
+        self.assertIn(date(2006, 10, 25), values)
+        self.assertEqual(hash(ApproximateDate(2006, 10, 25)), hash(date(2006, 10, 25)))
+
+    def test_validation(self):
+        self.assertRaises(ValueError, ApproximateDate, 2006, 2, 29)
+        self.assertRaises(ValueError, ApproximateDate, 2006, 13)
+        self.assertRaises(ValueError, ApproximateDate, 10000)
+        self.assertRaises(ValueError, ApproximateDate, 2006, 0, 1)
+        self.assertRaises(TypeError, ApproximateDate, '2006')
+        self.assertRaises(TypeError, ApproximateDate, 2006.5)
+        self.assertRaises(TypeError, ApproximateDate, 2006, 10.0)
+        self.assertRaises(ValueError, ApproximateDate)
+        self.assertRaises(ValueError, ApproximateDate, 0, 10)
+        self.assertEqual(ApproximateDate(2004, 2, 29).day, 29)
+
+
+class IntervalDates(unittest.TestCase):
+    def test_bounds(self):
+        self.assertEqual(ApproximateDate(2006).earliest(), date(2006, 1, 1))
+        self.assertEqual(ApproximateDate(2006).latest(), date(2006, 12, 31))
+        self.assertEqual(ApproximateDate(2008, 2).latest(), date(2008, 2, 29))
+        self.assertEqual(ApproximateDate(2006, 10, 25).earliest(), date(2006, 10, 25))
+        self.assertEqual(ApproximateDate(2006, 10, 25).latest(), date(2006, 10, 25))
+        self.assertEqual(ApproximateDate(past=True).latest(), date.min)
+        self.assertEqual(ApproximateDate(future=True).earliest(), date.max)
+
+    def test_overlaps(self):
+        self.assertTrue(ApproximateDate(2006).overlaps(ApproximateDate(2006, 10)))
+        self.assertTrue(ApproximateDate(2006, 10).overlaps(date(2006, 10, 31)))
+        self.assertFalse(ApproximateDate(2006, 10).overlaps(ApproximateDate(2006, 11, 1)))
+        self.assertFalse(ApproximateDate(future=True).overlaps(ApproximateDate(9999, 11)))
+        self.assertTrue(ApproximateDate(future=True).overlaps(ApproximateDate(future=True)))
+        self.assertRaises(TypeError, ApproximateDate(2006).overlaps, '2006')
+
+    def test_certainly_before(self):
+        self.assertTrue(ApproximateDate(2006, 9).certainly_before(ApproximateDate(2006, 10)))
+        self.assertFalse(ApproximateDate(2006).certainly_before(ApproximateDate(2006, 10)))
+        self.assertFalse(ApproximateDate(2006, 10).certainly_before(ApproximateDate(2006)))
+        self.assertTrue(ApproximateDate(past=True).certainly_before(date(2006, 1, 1)))
+        self.assertFalse(ApproximateDate(2006).certainly_before(ApproximateDate(2006)))
+
+
 class CompareDates(unittest.TestCase):
 
     def test_compare(self):
@@ -139,6 +263,14 @@ class CompareDates(unittest.TestCase):
         self.assertTrue(past == past_too)
         self.assertFalse(past != past_too)
 
+    def test_sort_key(self):
+        dates = [ApproximateDate(future=True), ApproximateDate(2006, 10, 25), ApproximateDate(2006),
+                 ApproximateDate(past=True), ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31)]
+        expected = [dates[3], dates[5], dates[2], dates[4], dates[1], dates[0]]
+        self.assertEqual(sorted(dates), expected)
+        self.assertEqual(sorted(dates, key=ApproximateDate.sort_key), expected)
+        self.assertEqual(ApproximateDate(2006, 10).sort_key(), 20061000)
+
     def test_compare_date(self):
         """
         You can compare Approximate date objects to regular date ones.
@@ -146,6 +278,8 @@ class CompareDates(unittest.TestCase):
         self.assertEqual(ApproximateDate(2008, 9, 3), date(2008, 9, 3))
         self.assertTrue(ApproximateDate(2008, 9, 3) < date(2009, 9, 3))
         self.assertTrue(ApproximateDate(2007) < date(2007, 9, 3))
+        self.assertTrue(ApproximateDate(future=True) < date(2007, 9, 3))
+        self.assertFalse(ApproximateDate(future=True) == date(2007, 9, 3))
 
 
 class Lengths(unittest.TestCase):
@@ -186,6 +320,29 @@ class ApproxDateI18n(unittest.TestCase):
         self.assertEqual(force_text(date), u'\u041c\u0430\u0439 2000')
 
 
+class FormattingTesting(unittest.TestCase):
+    formats = ('jS F Y', 'F Y', 'Y', 'd/m/y', 'N j, Y', 'E Y', 'M b n', r'\Y\e\a\r: Y', 'L')
+
+    def test_same_as_dateformat(self):
+        values = [ApproximateDate(2006, month, day) for month in range(1, 13) for day in (1, 2, 3, 11, 22, 28)]
+        values.append(ApproximateDate(999, 1, 1))
+        for language in ('en', 'ru', 'fr', 'pl'):
+            with translation.override(language):
+                for format_string in self.formats:
+                    for value in values:
+                        self.assertEqual(formatting.format_date(value, format_string),
+                                         dateformat.format(value, format_string))
+                        as_date = date(value.year, value.month, value.day)
+                        self.assertEqual(formatting.format_date(as_date, format_string),
+                                         dateformat.format(as_date, format_string))
+
+    def test_languages(self):
+        with translation.override('en'):
+            self.assertEqual(str(ApproximateDate(2000, 5)), 'May 2000')
+        with translation.override('ru'):
+            self.assertEqual(force_text(ApproximateDate(2000, 5)), u'\u041c\u0430\u0439 2000')
+
+
 class ApproximateDateFieldTesting(TestCase):
     def test_deconstruction(self):
         f = ApproximateDateField()
@@ -193,6 +350,48 @@ class ApproximateDateFieldTesting(TestCase):
         new_instance = ApproximateDateField(*args, **kwargs)
         self.assertEqual(f.max_length, new_instance.max_length)
 
+    def test_deconstruction_strict(self):
+        name, path, args, kwargs = ApproximateDateField(strict=True).deconstruct()
+        self.assertEqual(kwargs, {'strict': True})
+        self.assertTrue(ApproximateDateField(*args, **kwargs).strict)
+
+    def test_trusted_decoding(self):
+        for value in (ApproximateDate(2006, 10, 25), ApproximateDate(2006, 10), ApproximateDate(2006, 10),
+                      ApproximateDate(future=True), ApproximateDate(past=True), ''):
+            ApproxDateModel.objects.create(start=value)
+        starts = [obj.start for obj in ApproxDateModel.objects.order_by('pk')]
+        self.assertEqual(starts, [ApproximateDate(2006, 10, 25), ApproximateDate(2006, 10), ApproximateDate(2006, 10),
+                                  ApproximateDate(future=True), ApproximateDate(past=True), ''])
+        # Repeated values within a query are only decoded once.
+        self.assertIs(starts[1], starts[2])
+
+    def test_strict_decoding(self):
+        field = ApproximateDateField(strict=True)
+        self.assertEqual(field.get_db_converters(connection), [field.from_db_value])
+        self.assertRaises(forms.ValidationError, field.from_db_value, '2006-02-30')
+        self.assertEqual(ApproximateDateField().decode_trusted('2006-02-30').day, 30)
+
+    def test_bulk_encoding(self):
+        values = [ApproximateDate(2006, 10, 25), ApproximateDate(2006), date(999, 1, 2), datetime(2006, 10, 25, 3),
+                  ApproximateDate(future=True), 'past', '2006-10-00', None, '']
+        expected = ['2006-10-25', '2006-00-00', '0999-01-02', '2006-10-25', 'future', 'past', '2006-10-00', '', '']
+        field = ApproximateDateField()
+        self.assertEqual(field.get_prep_values(values), expected)
+        self.assertEqual([field.get_prep_value(value) for value in values], expected)
+        self.assertRaises(forms.ValidationError, field.get_prep_values, ['25/10/2006'])
+
+    @unittest.skipIf(DJANGO_VERSION < (2, 2), 'bulk_update() is new in Django 2.2')
+    def test_bulk_create_and_update(self):
+        ApproxDateModel.objects.bulk_create(
+            [ApproxDateModel(start=ApproximateDate(2000 + i, i % 12)) for i in range(10)])
+        objs = list(ApproxDateModel.objects.order_by('pk'))
+        for obj in objs:
+            obj.start = ApproximateDate(obj.start.year, obj.start.month, 1) if obj.start.month else 'future'
+        ApproxDateModel.objects.bulk_update(objs, ['start'])
+        starts = list(ApproxDateModel.objects.order_by('pk').values_list('start', flat=True))
+        self.assertEqual(starts[0], ApproximateDate(future=True))
+        self.assertEqual(starts[1], ApproximateDate(2001, 1, 1))
+
     def test_empty_fields(self):
         a1 = ApproxDateModel.objects.create(start="")
 
@@ -209,11 +408,938 @@ class ApproximateDateFieldTesting(TestCase):
         data = serializers.serialize("xml", [a])
         self.assertIn('<field name="start" type="CharField">2020-12-00</field>', data)
 
+    def test_fixture_round_trip(self):
+        values = [ApproximateDate(2020, 12), ApproximateDate(future=True), ApproximateDate(2020, 12, 31), '']
+        objs = [ApproxDateModel.objects.create(start=value or ApproximateDate(past=True), can_be_null=value)
+                for value in values]
+        for format in ('json', 'xml'):
+            data = serializers.serialize(format, ApproxDateModel.objects.filter(pk__in=[o.pk for o in objs]))
+            loaded = [(d.object.start, d.object.can_be_null) for d in serializers.deserialize(format, data)]
+            self.assertEqual(loaded, [(obj.start, obj.can_be_null) for obj in objs])
+        data = serializers.serialize('json', objs[:1]).replace('2020-12-00', '2020-13-00')
+        with self.assertRaises(serializers.base.DeserializationError) as cm:
+            list(serializers.deserialize('json', data))
+        self.assertIn('Invalid date: month must be in 1..12', str(cm.exception))
+
+
+class ApproximateDateLookupTesting(TestCase):
+    values = [ApproximateDate(future=True), ApproximateDate(2006, 10, 25), ApproximateDate(2006),
+              ApproximateDate(past=True), ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31),
+              ApproximateDate(2007, 1)]
+    bounds = [ApproximateDate(past=True), ApproximateDate(2006), ApproximateDate(2006, 10, 25),
+              ApproximateDate(2007), ApproximateDate(future=True)]
+
+    def setUp(self):
+        self.objects = ApproxDateModel.objects.filter(pk__in=[
+            ApproxDateModel.objects.create(start=value).pk for value in self.values + ['']])
+
+    def starts(self, **kwargs):
+        return sorted(obj.start for obj in self.objects.filter(**kwargs))
+
+    def test_comparisons(self):
+        for bound in self.bounds:
+            self.assertEqual(self.starts(start__lt=bound), sorted(v for v in self.values if v < bound))
+            self.assertEqual(self.starts(start__lte=bound), sorted(v for v in self.values if v <= bound))
+            self.assertEqual(self.starts(start__gt=bound), sorted(v for v in self.values if v > bound))
+            self.assertEqual(self.starts(start__gte=bound), sorted(v for v in self.values if v >= bound))
+        self.assertEqual(self.starts(start__lt=date(2006, 10, 25)), [
+            ApproximateDate(past=True), ApproximateDate(2005, 12, 31),
+            ApproximateDate(2006), ApproximateDate(2006, 10)])
+
+    def test_approx_range(self):
+        for start in self.bounds:
+            for end in self.bounds:
+                self.assertEqual(self.starts(start__approx_range=(start, end)),
+                                 sorted(v for v in self.values if start <= v <= end))
+
+    def test_year(self):
+        self.assertEqual(self.starts(start__year=2006),
+                         [ApproximateDate(2006), ApproximateDate(2006, 10), ApproximateDate(2006, 10, 25)])
+        self.assertEqual(self.starts(start__year__gt=2006), [ApproximateDate(2007, 1)])
+        self.assertEqual(self.starts(start__year__gte=2007), [ApproximateDate(2007, 1)])
+        self.assertEqual(self.starts(start__year__lt=2006), [ApproximateDate(2005, 12, 31)])
+        self.assertEqual(len(self.starts(start__year__lte=2006)), 4)
+
+    @unittest.skipIf(DJANGO_VERSION < (2, 1), 'Transforms in values() are new in Django 2.1')
+    def test_year_values(self):
+        years = self.objects.values_list('start__year', flat=True)
+        self.assertEqual(sorted(years, key=lambda y: y or 0), [None, None, None, 2005, 2006, 2006, 2006, 2007])
+
+    def test_overlaps(self):
+        others = self.bounds + self.values + [date(2006, 10, 25), datetime(2006, 11, 1, 12)]
+        for other in others:
+            self.assertEqual(self.starts(start__overlaps=other),
+                             sorted(v for v in self.values if v.overlaps(other)))
+        third_quarter = (date(2006, 7, 1), ApproximateDate(2006, 9))
+        self.assertEqual(self.starts(start__overlaps=third_quarter), [ApproximateDate(2006)])
+        self.assertEqual(self.starts(start__overlaps=(ApproximateDate(past=True), ApproximateDate(2006))),
+                         [ApproximateDate(past=True), ApproximateDate(2005, 12, 31), ApproximateDate(2006),
+                          ApproximateDate(2006, 10), ApproximateDate(2006, 10, 25)])
+
+    def test_certainly_before(self):
+        others = self.bounds + self.values + [date(2006, 10, 25), date(2007, 1, 1)]
+        for other in others:
+            self.assertEqual(self.starts(start__certainly_before=other),
+                             sorted(v for v in self.values if v.certainly_before(other)))
+
+    def test_precision(self):
+        for value in self.values:
+            self.assertEqual(self.starts(start__precision=value.precision),
+                             [v for v in sorted(self.values) if v.precision == value.precision])
+
+    @unittest.skipIf(DJANGO_VERSION < (2, 1), 'Transforms in values() are new in Django 2.1')
+    def test_precision_values(self):
+        precisions = self.objects.filter(start='').values_list('start__precision', flat=True)
+        self.assertEqual(list(precisions), [None])
+
+
+class ApproximateDateFunctionTesting(TestCase):
+    values = [ApproximateDate(future=True), ApproximateDate(past=True), ApproximateDate(2006, 10, 25),
+              ApproximateDate(2006), ApproximateDate(2006, 10), ApproximateDate(2006, 4), ApproximateDate(2006, 2),
+              ApproximateDate(2004, 2), ApproximateDate(2000, 2), ApproximateDate(1900, 2), ApproximateDate(2005, 12),
+              ApproximateDate(2000, 2, 29)]
+
+    def setUp(self):
+        self.objects = ApproxDateModel.objects.filter(pk__in=[
+            ApproxDateModel.objects.create(start=value).pk for value in self.values + ['']])
+
+    def test_annotate(self):
+        rows = self.objects.annotate(
+            year=ApproxYear('start'), month=ApproxMonth('start'), precision=ApproxPrecision('start'),
+            earliest=ApproxEarliest('start'), latest=ApproxLatest('start'),
+        ).values_list('start', 'year', 'month', 'precision', 'earliest', 'latest')
+        for start, year, month, precision, earliest, latest in rows:
+            if not start:
+                self.assertEqual((year, month, precision, earliest, latest), (None,) * 5)
+                continue
+            dated = not start.past and not start.future
+            self.assertEqual(year, start.year if dated else None)
+            self.assertEqual(month, start.month if dated and start.month else None)
+            self.assertEqual(precision, start.precision)
+            self.assertEqual(earliest, start.earliest())
+            self.assertEqual(latest, start.latest())
+
+    def test_expressions(self):
+        # Values and other expressions compile with params of their own.
+        obj = self.objects.first()
+        for value in self.values:
+            stored = models.Value(ApproxDateModel._meta.get_field('start').get_prep_value(value),
+                                  output_field=models.CharField())
+            for lhs in (stored, Coalesce(stored, models.Value(''))):
+                row = ApproxDateModel.objects.filter(pk=obj.pk).annotate(
+                    year=ApproxYear(lhs), month=ApproxMonth(lhs), precision=ApproxPrecision(lhs),
+                    earliest=ApproxEarliest(lhs), latest=ApproxLatest(lhs), key=ApproximateDateOrder(lhs),
+                ).values_list('year', 'month', 'precision', 'earliest', 'latest', 'key').get()
+                dated = not value.past and not value.future
+                self.assertEqual(row, (
+                    value.year if dated else None, value.month if dated and value.month else None,
+                    value.precision, value.earliest(), value.latest(), value.sort_key()))
+
+    def test_transforms(self):
+        self.assertEqual(len(self.objects.filter(start__month=2)), 5)
+        self.assertEqual(sorted(o.start for o in self.objects.filter(start__latest__lt=date(2006, 1, 1))), [
+            ApproximateDate(past=True), ApproximateDate(1900, 2), ApproximateDate(2000, 2),
+            ApproximateDate(2000, 2, 29), ApproximateDate(2004, 2), ApproximateDate(2005, 12)])
+        self.assertEqual(len(self.objects.filter(start__earliest__year=2006)), 5)
+
+    def test_aggregate(self):
+        counts = self.objects.values(year=ApproxYear('start'), month=ApproxMonth('start')).annotate(
+            n=models.Count('pk')).order_by('year', 'month')
+        counts = dict(((row['year'], row['month']), row['n']) for row in counts)
+        self.assertEqual(counts, {
+            (None, None): 3, (1900, 2): 1, (2000, 2): 2, (2004, 2): 1, (2005, 12): 1,
+            (2006, None): 1, (2006, 2): 1, (2006, 4): 1, (2006, 10): 2,
+        })
+
+    @unittest.skipIf(DJANGO_VERSION < (3, 2), 'Indexes on expressions are new in Django 3.2')
+    def test_index(self):
+        index = models.Index(ApproxYear('start'), ApproxLatest('start'), name='approx_year_latest')
+        editor = connection.schema_editor(collect_sql=True)
+        with connection.cursor() as cursor:
+            cursor.execute(str(index.create_sql(ApproxDateModel, editor)))
+            cursor.execute(str(index.remove_sql(ApproxDateModel, editor)))
+
+
+class ApproximateDateOrderTesting(TestCase):
+    values = [ApproximateDate(future=True), ApproximateDate(2006, 10, 25), ApproximateDate(2006),
+              ApproximateDate(past=True), ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31),
+              ApproximateDate(2007, 1), ApproximateDate(1999, 1, 1)]
+
+    def setUp(self):
+        self.objects = ApproxDateModel.objects.filter(pk__in=[
+            ApproxDateModel.objects.create(start=value).pk for value in self.values])
+
+    def test_order_by(self):
+        starts = [obj.start for obj in self.objects.order_by(ApproximateDateOrder('start'))]
+        self.assertEqual(starts, sorted(self.values))
+        starts = [obj.start for obj in self.objects.order_by(ApproximateDateOrder('start').desc())]
+        self.assertEqual(starts, sorted(self.values, reverse=True))
+
+    def test_sort_key(self):
+        for obj in self.objects.annotate(key=ApproximateDateOrder('start')):
+            self.assertEqual(obj.key, obj.start.sort_key())
+        empty = ApproxDateModel.objects.create(start='')
+        self.assertIsNone(ApproxDateModel.objects.annotate(key=ApproximateDateOrder('start')).get(pk=empty.pk).key)
+
+    def test_keyset_pagination(self):
+        qs = self.objects.annotate(key=ApproximateDateOrder('start')).order_by('key', 'pk')
+        pages = []
+        page = list(qs[:3])
+        while page:
+            pages.extend(obj.start for obj in page)
+            page = list(qs.filter(key__gt=page[-1].start.sort_key())[:3])
+        self.assertEqual(pages, sorted(self.values))
+
+    @unittest.skipIf(DJANGO_VERSION < (2, 0), 'Window expressions are new in Django 2.0')
+    def test_window(self):
+        qs = self.objects.annotate(
+            position=Window(expression=RowNumber(), order_by=ApproximateDateOrder(F('start')).asc()))
+        positions = dict((obj.position, obj.start) for obj in qs)
+        self.assertEqual([positions[i + 1] for i in range(len(self.values))], sorted(self.values))
+
+
+class ApproximateDateDateFieldTesting(TestCase):
+    values = [ApproximateDate(future=True), ApproximateDate(2006, 10, 25), ApproximateDate(2006),
+              ApproximateDate(past=True), ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31),
+              ApproximateDate(2006, 1, 1), ApproximateDate(2006, 1)]
+
+    def test_columns(self):
+        names = [field.attname for field in ApproxDateDateModel._meta.concrete_fields]
+        self.assertEqual(names, ['id', 'old', 'start_date', 'start_precision'])
+
+    def test_round_trip(self):
+        for value in self.values + [None]:
+            ApproxDateDateModel.objects.create(start=value)
+        starts = [obj.start for obj in ApproxDateDateModel.objects.order_by('pk')]
+        self.assertEqual(starts, self.values + [None])
+        self.assertIs(starts[0], ApproximateDate(future=True))
+        obj = ApproxDateDateModel.objects.get(start_date=date(2006, 10, 1))
+        self.assertEqual((obj.start_date, obj.start_precision), (date(2006, 10, 1), 2))
+
+    def test_database_ordering(self):
+        for value in self.values:
+            ApproxDateDateModel.objects.create(start=value)
+        starts = [obj.start for obj in ApproxDateDateModel.objects.order_by('start', 'start_precision')]
+        self.assertEqual(starts, sorted(self.values))
+        self.assertEqual(ApproxDateDateModel.objects.filter(start__year=2006).count(), 5)
+        self.assertEqual(ApproxDateDateModel.objects.filter(start__gte=ApproximateDate(2006, 10)).count(), 3)
+
+    def test_lookups_compare_earliest(self):
+        for value in (ApproximateDate(2006, 10), ApproximateDate(2006, 10, 1), ApproximateDate(2006, 10, 2)):
+            ApproxDateDateModel.objects.create(start=value)
+        objects = ApproxDateDateModel.objects.order_by('start', 'start_precision')
+        # Only the day is compared, though 2006-10-01 sorts after October 2006.
+        self.assertEqual([obj.start for obj in objects.filter(start__gt=ApproximateDate(2006, 10))],
+                         [ApproximateDate(2006, 10, 2)])
+        self.assertEqual(objects.filter(start=ApproximateDate(2006, 10)).count(), 2)
+        self.assertEqual([obj.start for obj in objects.filter(start=ApproximateDate(2006, 10),
+                                                              start_precision=PRECISION_MONTH)],
+                         [ApproximateDate(2006, 10)])
+        self.assertEqual(list(objects.values_list('start', flat=True)),
+                         [date(2006, 10, 1), date(2006, 10, 1), date(2006, 10, 2)])
+
+    def test_assignment(self):
+        obj = ApproxDateDateModel(start='2006-10-00')
+        self.assertEqual(obj.start, ApproximateDate(2006, 10))
+        obj.start = date(2006, 10, 25)
+        self.assertEqual(obj.start, ApproximateDate(2006, 10, 25))
+        obj.full_clean()
+        self.assertEqual(obj.start, ApproximateDate(2006, 10, 25))
+        obj.start = ''
+        self.assertEqual((obj.start, obj.start_date, obj.start_precision), (None, None, None))
+
+    def test_form(self):
+        form_class = forms.modelform_factory(ApproxDateDateModel, fields=('start',))
+        self.assertIsInstance(form_class.base_fields['start'], ApproximateDateFormField)
+        form = form_class({'start': 'October 2006'})
+        self.assertTrue(form.is_valid())
+        obj = form.save()
+        self.assertEqual(ApproxDateDateModel.objects.get(pk=obj.pk).start, ApproximateDate(2006, 10))
+        self.assertEqual(form_class(instance=obj).initial['start'], ApproximateDate(2006, 10))
+
+    def test_serialization(self):
+        a = ApproxDateDateModel.objects.create(start=ApproximateDate(year=2020, month=12))
+        data = serializers.serialize("json", [a])
+        self.assertIn('"start": "2020-12-00"', data)
+        obj = next(serializers.deserialize("json", data)).object
+        self.assertEqual(obj.start, ApproximateDate(2020, 12))
+
+
+class MigrateApproximateDatesTesting(TestCase):
+    values = ['future', '2006-10-25', '2006-00-00', 'past', '', '2006-10-00', '2005-12-31']
+
+    def setUp(self):
+        self.objects = [ApproxDateDateModel.objects.create(old=value) for value in self.values]
+        self.directory = tempfile.mkdtemp()
+        self.checkpoint = os.path.join(self.directory, 'checkpoint.json')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def migrate(self, **kwargs):
+        call_command('migrate_approximate_dates', 'django_date_extensions.ApproxDateDateModel', 'old', 'start',
+                     batch_size=3, checkpoint=self.checkpoint, stdout=StringIO(), **kwargs)
+
+    def starts(self):
+        return [obj.start for obj in ApproxDateDateModel.objects.order_by('pk')]
+
+    def test_migrate(self):
+        self.migrate()
+        self.assertEqual(self.starts(), [
+            ApproximateDate(future=True), ApproximateDate(2006, 10, 25), ApproximateDate(2006),
+            ApproximateDate(past=True), None, ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31)])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_resume(self):
+        with open(self.checkpoint, 'w') as f:
+            f.write('{"model": "django_date_extensions.approxdatedatemodel", "source": "old", "target": "start", '
+                    '"last_pk": %d}' % self.objects[3].pk)
+        self.migrate()
+        starts = self.starts()
+        self.assertEqual(starts[:4], [None] * 4)
+        self.assertEqual(starts[4:], [None, ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31)])
+        self.migrate(restart=True)
+        self.assertEqual(self.starts()[0], ApproximateDate(future=True))
+
+    def test_invalid(self):
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE %s SET old = %%s WHERE id = %%s' % ApproxDateDateModel._meta.db_table,
+                           ['2006-13-00', self.objects[1].pk])
+        err = StringIO()
+        self.migrate(stderr=err)
+        self.assertIn('Skipped primary key %d: Invalid date: ' % self.objects[1].pk, err.getvalue())
+        self.assertEqual(self.starts(), [
+            ApproximateDate(future=True), None, ApproximateDate(2006),
+            ApproximateDate(past=True), None, ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31)])
+
+    def test_other_checkpoint(self):
+        with open(self.checkpoint, 'w') as f:
+            f.write('{"model": "django_date_extensions.approxdatemodel", "source": "start", "target": "start", '
+                    '"last_pk": 1}')
+        self.assertRaises(CommandError, self.migrate)
+
+
+class ApproximateDateArrayTesting(TestCase):
+    values = [ApproximateDate(future=True), ApproximateDate(2006, 10, 25), ApproximateDate(2006),
+              ApproximateDate(past=True), None, ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31),
+              ApproximateDate(2006, 10, 1), ApproximateDate(2007)]
+    backends = [False] if arrays.numpy is None else [False, True]
+
+    def test_sequence(self):
+        for use_numpy in self.backends:
+            dates = ApproximateDateArray(self.values, use_numpy=use_numpy)
+            self.assertEqual(len(dates), len(self.values))
+            self.assertEqual(list(dates), self.values)
+            self.assertIs(dates[0], ApproximateDate(future=True))
+            self.assertEqual(dates[-1], ApproximateDate(2007))
+            self.assertEqual(list(dates[1:3]), self.values[1:3])
+            self.assertEqual(dates.nbytes, 4 * len(self.values))
+
+    def test_comparisons(self):
+        present = [v for v in self.values if v is not None]
+        for use_numpy in self.backends:
+            dates = ApproximateDateArray(self.values, use_numpy=use_numpy)
+            for other in [ApproximateDate(past=True), ApproximateDate(2006, 10), ApproximateDate(future=True)]:
+                self.assertEqual(list(dates[dates < other]), [v for v in present if v < other])
+                self.assertEqual(list(dates[dates >= other]), [v for v in present if v >= other])
+                self.assertEqual(list(dates[dates == other]), [v for v in present if v == other])
+            self.assertEqual(list(dates[dates <= date(2006, 10, 1)]), [
+                ApproximateDate(future=True), ApproximateDate(2006), ApproximateDate(past=True),
+                ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31), ApproximateDate(2006, 10, 1)])
+            # Each value compares as it would on its own, future included.
+            for other in [date(2006, 10, 1), date(2006, 10, 25), datetime(2007, 1, 1, 12)]:
+                for op in ('__lt__', '__le__', '__gt__', '__ge__', '__eq__', '__ne__'):
+                    self.assertEqual(list(dates[getattr(dates, op)(other)]),
+                                     [v for v in present if getattr(v, op)(other)])
+
+    def test_sorting(self):
+        for use_numpy in self.backends:
+            dates = ApproximateDateArray(self.values, use_numpy=use_numpy)
+            ordered = dates.sorted()
+            self.assertEqual(list(ordered), [None] + sorted(v for v in self.values if v is not None))
+            self.assertEqual([self.values[i] for i in dates.argsort()], list(ordered))
+            self.assertEqual(ordered.searchsorted(ApproximateDate(2006, 10)), 4)
+            self.assertEqual(ordered.searchsorted(ApproximateDate(2006, 10), side='right'), 5)
+            self.assertEqual(dates.min(), ApproximateDate(past=True))
+            self.assertEqual(dates.max(), ApproximateDate(future=True))
+            self.assertIsNone(ApproximateDateArray([None], use_numpy=use_numpy).min())
+
+    def test_precision_and_counts(self):
+        for use_numpy in self.backends:
+            dates = ApproximateDateArray(self.values, use_numpy=use_numpy)
+            for precision in ('day', 'month', 'year', 'past', 'future'):
+                self.assertEqual(list(dates[dates.precision_mask(precision)]),
+                                 [v for v in self.values if v is not None and v.precision == precision])
+            self.assertEqual(dates.year_counts(), {2005: 1, 2006: 4, 2007: 1})
+            self.assertEqual(dates.month_counts(), {(2005, 12): 1, (2006, 10): 3})
+
+    def test_from_queryset(self):
+        for value in self.values:
+            ApproxDateModel.objects.create(start=value or '')
+            ApproxDateIntegerModel.objects.create(start=value)
+        for model in (ApproxDateModel, ApproxDateIntegerModel):
+            qs = model.objects.filter(pk__in=[obj.pk for obj in model.objects.order_by('-pk')[:len(self.values)]])
+            for use_numpy in self.backends:
+                dates = ApproximateDateArray.from_queryset(qs.order_by('pk'), 'start', use_numpy=use_numpy)
+                self.assertEqual(dates.uses_numpy, use_numpy)
+                self.assertEqual(list(dates), self.values)
+
+
+class ImportingTesting(TestCase):
+    rows = [
+        {'old': 'October 2006', 'start': '2006', 'note': 'x'},
+        {'old': '', 'start': '25th Dec 2005', 'note': ''},
+        {'old': 'not a date', 'start': '2006', 'note': ''},
+        {'old': 'future', 'start': '', 'note': ''},
+    ]
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def imported(self):
+        return [(obj.old, obj.start) for obj in ApproxDateDateModel.objects.order_by('pk')]
+
+    def test_import_rows(self):
+        rejects = []
+        writer = type('Rejects', (object,), {'write': lambda self, row, error: rejects.append((row, error))})()
+        rows = (row for row in self.rows)
+        result = importing.import_rows(ApproxDateDateModel, rows, batch_size=2, rejects=writer)
+        self.assertEqual(result, (3, 1))
+        self.assertEqual(self.imported(), [
+            (ApproximateDate(2006, 10), ApproximateDate(2006)),
+            ('', ApproximateDate(2005, 12, 25)),
+            (ApproximateDate(future=True), None),
+        ])
+        self.assertEqual(rejects, [(self.rows[2], 'old: Please enter a valid date.')])
+
+    @unittest.skipIf(sys.version_info[0] < 3, 'Importing files needs Python 3')
+    def test_csv(self):
+        path = os.path.join(self.directory, 'dates.csv')
+        rejects_path = os.path.join(self.directory, 'rejects.csv')
+        with open(path, 'w') as f:
+            # Only old is free text; start is as stored.
+            f.write('old,start,note\nOctober 2006,2006-00-00,x\n,2005-12-25,\nnot a date,2006-00-00,\n')
+        result = importing.import_file(ApproxDateDateModel, path, rejects_path=rejects_path, dates=['old'])
+        self.assertEqual(result, (2, 1))
+        with open(rejects_path) as f:
+            self.assertEqual(f.read().splitlines(), [
+                'old,start,note,error', 'not a date,2006-00-00,,old: Please enter a valid date.'])
+        self.assertEqual(self.imported()[1], ('', ApproximateDate(2005, 12, 25)))
+
+    @unittest.skipIf(sys.version_info[0] < 3, 'Importing files needs Python 3')
+    def test_command(self):
+        path = os.path.join(self.directory, 'dates.jsonl')
+        rejects_path = os.path.join(self.directory, 'rejects.jsonl')
+        with open(path, 'w') as f:
+            f.write(''.join(json.dumps(row) + '\n' for row in self.rows))
+        out = StringIO()
+        call_command('import_approximate_dates', 'django_date_extensions.ApproxDateDateModel', path,
+                     rejects=rejects_path, batch_size=3, stdout=out)
+        self.assertIn('Imported 3 rows, rejected 1.', out.getvalue())
+        with open(rejects_path) as f:
+            self.assertEqual(json.loads(f.read())['error'], 'old: Please enter a valid date.')
+
+
+class ParseManyTesting(unittest.TestCase):
+    values = ['2006', 'Oct 2006', '', 'not a date', '25th October 2006', 'future', '31/2/2006', '1/2/06']
+
+    def expected(self):
+        field = ApproximateDateFormField(required=False)
+        results = []
+        for value in self.values:
+            try:
+                results.append(field.clean(value))
+            except forms.ValidationError as e:
+                results.append(e.messages)
+        return results
+
+    def check(self, results):
+        self.assertEqual([r.messages if isinstance(r, forms.ValidationError) else r for r in results],
+                         self.expected())
+
+    def test_in_process(self):
+        self.check(batch.parse_many(self.values, workers=1, chunk_size=3))
+        self.check(batch.parse_many(iter(self.values), workers=1))
+
+    @unittest.skipUnless(hasattr(os, 'cpu_count'), 'os.cpu_count() is new in Python 3.4')
+    def test_unknown_cpu_count(self):
+        cpu_count = os.cpu_count
+        os.cpu_count = lambda: None
+        try:
+            self.check(batch.parse_many(self.values))
+        finally:
+            os.cpu_count = cpu_count
+
+    def test_process_pool(self):
+        self.check(batch.parse_many(self.values * 3, workers=2, chunk_size=5)[:len(self.values)])
+        self.check(batch.parse_many(self.values * 3, workers=2, chunk_size=5)[-len(self.values):])
+
+
+class LegacyPickle(object):
+    """Pickles as ApproximateDate(2006, 10) used to with protocols 0 and 1:
+       a bare instance of the class, given the state of its __dict__."""
+    def __reduce__(self):
+        return copyreg._reconstructor, (ApproximateDate, object, None), {
+            'future': False, 'past': False, 'year': 2006, 'month': 10, 'day': 0}
+
+
+@override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}})
+class CodecTesting(SimpleTestCase):
+    values = [ApproximateDate(2006, 10, 25), None, ApproximateDate(2006), ApproximateDate(future=True),
+              ApproximateDate(past=True), ApproximateDate(1, 1, 1), ApproximateDate(9999, 12, 31)]
+
+    def test_pickle(self):
+        legacy = pickle.dumps(LegacyPickle(), 2)
+        self.assertEqual(pickle.loads(legacy), ApproximateDate(2006, 10))
+        self.assertLess(len(pickle.dumps(ApproximateDate(2006, 10), 2)), len(legacy))
+        self.assertEqual(pickle.loads(pickle.dumps(self.values)), self.values)
+
+    def test_json(self):
+        data = json.dumps({'start': ApproximateDate(2006, 10), 'on': date(2006, 10, 25)},
+                          cls=codec.ApproximateDateJSONEncoder, sort_keys=True)
+        self.assertEqual(data, '{"on": "2006-10-25", "start": "2006-10-00"}')
+        self.assertEqual(json.dumps(ApproximateDate(past=True), cls=codec.ApproximateDateJSONEncoder), '"past"')
+
+    def test_pack(self):
+        packed = codec.pack(self.values)
+        self.assertEqual(len(packed), 4 * len(self.values))
+        unpacked = codec.unpack(packed)
+        self.assertEqual(unpacked, self.values)
+        self.assertIs(unpacked[3], ApproximateDate(future=True))
+
+    def test_cache(self):
+        values = [ApproximateDate(1900 + i % 100, i % 13, i % 28 + 1 if i % 13 else 0) for i in range(1000)]
+        cache = caches['default']
+        cache.set('packed', codec.pack(values))
+        cache.set('pickled', values)
+        self.assertEqual(codec.unpack(cache.get('packed')), values)
+        self.assertEqual(cache.get('pickled'), values)
+        self.assertLess(len(codec.pack(values)) * 2, len(pickle.dumps(values, pickle.HIGHEST_PROTOCOL)))
+
+
+class ApproximateDateIntegerFieldTesting(TestCase):
+    values = [ApproximateDate(future=True), ApproximateDate(2006, 10, 25), ApproximateDate(2006),
+              ApproximateDate(past=True), ApproximateDate(2006, 10), ApproximateDate(2005, 12, 31)]
+
+    def test_deconstruction(self):
+        name, path, args, kwargs = ApproximateDateIntegerField(null=True).deconstruct()
+        self.assertEqual(path, 'django_date_extensions.fields.ApproximateDateIntegerField')
+        self.assertEqual(kwargs, {'null': True})
+
+    def test_round_trip(self):
+        for value in self.values + [None]:
+            ApproxDateIntegerModel.objects.create(start=value)
+        starts = list(ApproxDateIntegerModel.objects.order_by('pk').values_list('start', flat=True))
+        self.assertEqual(starts, self.values + [None])
+        self.assertIs(starts[0], ApproximateDate(future=True))
+
+    def test_database_ordering(self):
+        for value in self.values:
+            ApproxDateIntegerModel.objects.create(start=value)
+        starts = list(ApproxDateIntegerModel.objects.order_by('start').values_list('start', flat=True))
+        self.assertEqual(starts, sorted(self.values))
+        qs = ApproxDateIntegerModel.objects.filter(start__range=(ApproximateDate(2006), date(2006, 12, 31)))
+        self.assertEqual(qs.count(), 3)
+        self.assertEqual(ApproxDateIntegerModel.objects.filter(start__gt='2006-10-25').count(), 1)
+
+    def test_clean(self):
+        obj = ApproxDateIntegerModel(start='2006-10-00')
+        obj.full_clean()
+        self.assertEqual(obj.start, ApproximateDate(2006, 10))
+        self.assertRaises(forms.ValidationError, ApproxDateIntegerModel(start=20061099).full_clean)
+
+    def test_formfield(self):
+        self.assertIsInstance(ApproximateDateIntegerField().formfield(), ApproximateDateFormField)
+
+    def test_serialization(self):
+        a = ApproxDateIntegerModel.objects.create(start=ApproximateDate(year=2020, month=12))
+        data = serializers.serialize("json", [a])
+        self.assertIn('"start": "2020-12-00"', data)
+        obj = next(serializers.deserialize("json", data)).object
+        self.assertEqual(obj.start, ApproximateDate(2020, 12))
+
 
 class ApproximateDateFormTesting(unittest.TestCase):
     def test_form(self):
         ApproxDateForm()
 
 
+class EventForm(forms.Form):
+    start = ApproximateDateFormField()
+    due = PrettyDateField(future=True, required=False)
+
+
+class BatchCleaningTesting(SimpleTestCase):
+    def test_clock(self):
+        field = PrettyDateField(future=True, clock=lambda: date(2021, 12, 31))
+        self.assertEqual(field.clean('1st Jan'), date(2022, 1, 1))
+        self.assertEqual(field.clean('31 Dec'), date(2021, 12, 31))
+        field = PrettyDateField(future=False, clock=lambda: date(2021, 1, 1))
+        self.assertEqual(field.clean('2 Jan'), date(2020, 1, 2))
+
+    def test_clock_only_if_needed(self):
+        days = []
+        field = PrettyDateField(future=True, clock=lambda: days.append(1) or date(2021, 6, 1))
+        for i in range(2):
+            self.assertEqual(field.clean('25 October 2006'), date(2006, 10, 25))
+            self.assertRaises(forms.ValidationError, field.clean, 'Octo 2006')
+        self.assertEqual(days, [])
+        for i in range(2):
+            self.assertEqual(field.clean('7 Jul'), date(2021, 7, 7))
+        self.assertEqual(days, [1, 1])
+
+    def test_clean_many(self):
+        values = ['2006', 'Oct 2006', '2006', '', 'Octo 2006', 'Octo 2006', 'future']
+        results = ApproximateDateFormField(required=False).clean_many(values)
+        self.assertEqual(results[:4], [ApproximateDate(2006), ApproximateDate(2006, 10), ApproximateDate(2006), None])
+        self.assertIsInstance(results[4], forms.ValidationError)
+        self.assertIs(results[4], results[5])
+        self.assertEqual(results[4].messages, ['Please enter a valid date.'])
+        self.assertEqual(results[6], ApproximateDate(future=True))
+        self.assertEqual(ApproximateDateFormField().clean_many([''])[0].messages, ['This field is required.'])
+
+        field = PrettyDateField(future=True, clock=lambda: date(2006, 1, 1))
+        self.assertEqual(field.clean_many(['1 Jan', '1 Jan'], today=date(2006, 6, 1)), [date(2007, 1, 1)] * 2)
+
+    def test_formset(self):
+        data = {'form-TOTAL_FORMS': '4', 'form-INITIAL_FORMS': '0'}
+        for i, (start, due) in enumerate([('2006', '1 Jan'), ('Oct 2006', '31st Dec'), ('', 'Octo'), ('2006', '')]):
+            data['form-%d-start' % i] = start
+            data['form-%d-due' % i] = due
+        plain = forms.formset_factory(EventForm)(data)
+        batched = forms.formset_factory(EventForm, formset=type(
+            'BatchedFormSet', (ApproximateDateFormSetMixin, forms.BaseFormSet),
+            {'clock': lambda self: date(2021, 12, 31)}))(data)
+
+        self.assertFalse(batched.is_valid())
+        self.assertEqual(batched.errors, plain.errors)
+        self.assertEqual(batched.errors[2], {
+            'start': ['This field is required.'], 'due': ['Please enter a valid date.']})
+        self.assertEqual(batched.forms[0].cleaned_data, {'start': ApproximateDate(2006), 'due': date(2022, 1, 1)})
+        self.assertEqual(batched.forms[1].cleaned_data, {
+            'start': ApproximateDate(2006, 10), 'due': date(2021, 12, 31)})
+        self.assertEqual(batched.forms[3].cleaned_data, {'start': ApproximateDate(2006), 'due': None})
+        self.assertIs(batched.forms[0].fields['start'].prefetched, batched.forms[3].fields['start'].prefetched)
+
+    def test_formset_fields_differ(self):
+        data = {'form-TOTAL_FORMS': '2', 'form-INITIAL_FORMS': '0',
+                'form-0-start': '', 'form-0-due': '1 Jan', 'form-1-start': '', 'form-1-due': '1 Jan'}
+
+        class FormSet(ApproximateDateFormSetMixin, forms.BaseFormSet):
+            def clock(self):
+                return date(2021, 12, 31)
+
+            def add_fields(self, form, index):
+                super(FormSet, self).add_fields(form, index)
+                # Only the second form needs a start, and looks back for due.
+                form.fields['start'].required = index == 1
+                if index == 1:
+                    form.fields['due'] = PrettyDateField(future=False)
+
+        formset = forms.formset_factory(EventForm, formset=FormSet)(data)
+        self.assertFalse(formset.is_valid())
+        self.assertEqual(formset.forms[0].cleaned_data, {'start': None, 'due': date(2022, 1, 1)})
+        self.assertEqual(formset.errors[1], {'start': ['This field is required.']})
+        self.assertEqual(formset.forms[1].cleaned_data, {'due': date(2021, 1, 1)})
+
+
+class CoreTesting(SimpleTestCase):
+    def test_without_django(self):
+        env = dict(os.environ)
+        env.pop('DJANGO_SETTINGS_MODULE', None)
+        script = (
+            'import sys\n'
+            'from django_date_extensions import core\n'
+            'value = core.parse("25th October 2006")\n'
+            'print("%s|%s|%s" % (value, core.encode(value), core.decode("2006-10-00")))\n'
+            'print(sorted(set(m.split(".")[0] for m in sys.modules) & set(["django"])))\n'
+        )
+        output = subprocess.check_output(
+            [sys.executable, '-c', script], env=env, universal_newlines=True,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(output.splitlines(), ['25th October 2006|2006-10-25|October 2006', '[]'])
+
+    def test_codecs(self):
+        self.assertEqual(core.encode(ApproximateDate(2006, 10)), '2006-10-00')
+        self.assertEqual(core.encode(date(2006, 10, 25)), '2006-10-25')
+        self.assertEqual(core.encode(None), '')
+        self.assertRaises(ValueError, core.encode, '25/10/2006')
+        self.assertEqual(core.decode('future'), ApproximateDate(future=True))
+        self.assertRaises(ValueError, core.decode, '2006-13-00')
+        self.assertRaises(forms.ValidationError, ApproximateDateField().get_prep_value, '25/10/2006')
+        self.assertEqual(core.parse(' 2nd Oct 2006 '), ApproximateDate(2006, 10, 2))
+        self.assertIsNone(core.parse(''))
+        self.assertRaises(ValueError, core.parse, 'Octo 2006')
+
+    def test_plain_format(self):
+        self.assertEqual(core.plain_format(ApproximateDate(2006, 10, 1), 'jS F Y'), '1st October 2006')
+        self.assertEqual(core.plain_format(date(2006, 1, 22), r'd/m/y \Y\e\a\r: Y, M b n'),
+                         '22/01/06 Year: 2006, Jan jan 1')
+
+    def test_settings(self):
+        self.assertEqual(core.conf.OUTPUT_FORMAT_YEAR, 'Y')
+        with override_settings(DATE_EXTENSIONS_OUTPUT_FORMAT_YEAR=r'\Y\e\a\r Y'):
+            self.assertEqual(core.conf.OUTPUT_FORMAT_YEAR, r'\Y\e\a\r Y')
+            self.assertEqual(str(ApproximateDate(2006)), 'Year 2006')
+        self.assertEqual(str(ApproximateDate(2006)), '2006')
+        self.assertRaises(AttributeError, getattr, core.conf, 'NOT_A_SETTING')
+
+
+class ParsingTesting(unittest.TestCase):
+    known_inputs = (
+        ('2006-10-25', ApproximateDate(2006, 10, 25)),
+        ('25/10/06', ApproximateDate(2006, 10, 25)),
+        ('25th October, 2006', ApproximateDate(2006, 10, 25)),
+        ('oct 25 2006', ApproximateDate(2006, 10, 25)),
+        ('29/02/2004', ApproximateDate(2004, 2, 29)),
+        ('10/2006', ApproximateDate(2006, 10)),
+        ('2006 October', ApproximateDate(2006, 10)),
+        ('Oct  2006', ApproximateDate(2006, 10)),
+        ('2006', ApproximateDate(2006)),
+    )
+
+    def test_approximate_date_form_field(self):
+        field = ApproximateDateFormField()
+        for value, expected in self.known_inputs:
+            self.assertEqual(field.clean(value), expected)
+        for value in ('29/02/2005', '2006-10-25x', '0000', 'Octo 2006'):
+            self.assertRaises(forms.ValidationError, field.clean, value)
+
+    def test_pretty_date_field(self):
+        self.assertEqual(PrettyDateField().clean('25th October 2006'), date(2006, 10, 25))
+        self.assertRaises(forms.ValidationError, PrettyDateField().clean, '25 October')
+        today = date.today()
+        self.assertEqual(PrettyDateField(future=True).clean(today.strftime('%d/%m')), today)
+        self.assertEqual(PrettyDateField(future=False).clean(today.strftime('%d %B')), today)
+
+    def test_strptime_fallback(self):
+        parser = parsing.DateParser((('date', ('%Y %j', '%A %d %B %Y', '%d/%m/%Y')),))
+
+        def convert(tag, year, month, day, yday):
+            return year, month, day
+
+        self.assertEqual(parser.parse('2006 298', convert), (2006, 10, 25))
+        self.assertEqual(parser.parse('Wednesday 25 October 2006', convert), (2006, 10, 25))
+        self.assertEqual(parser.parse('25/10/2006', convert), (2006, 10, 25))
+        self.assertRaises(ValueError, parser.parse, '2006', convert)
+
+    def test_threads(self):
+        field = ApproximateDateFormField()
+        values = [value for value, expected in self.known_inputs] * 200
+        expected = [field.clean(value) for value in values]
+        results = {}
+
+        def clean_all(n):
+            results[n] = [field.clean(value) for value in values]
+
+        threads = [threading.Thread(target=clean_all, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 8)
+        for result in results.values():
+            self.assertEqual(result, expected)
+
+
+class AdaptiveParsingTesting(SimpleTestCase):
+    groups = (
+        ('date', date_settings.DEFAULTS['DATE_INPUT_FORMATS']),
+        ('month', date_settings.DEFAULTS['MONTH_INPUT_FORMATS']),
+        ('year', date_settings.DEFAULTS['YEAR_INPUT_FORMATS']),
+        ('day_month', date_settings.DEFAULTS['DAY_MONTH_INPUT_FORMATS']),
+    )
+
+    @staticmethod
+    def convert(tag, year, month, day, yday):
+        return tag, year, month, day
+
+    def results(self, parser, inputs):
+        results = []
+        for value in inputs:
+            try:
+                results.append(parser.parse(value, self.convert))
+            except ValueError:
+                results.append(None)
+        return results
+
+    def inputs(self):
+        rand = random.Random(1)
+        inputs = []
+        for tag, formats in self.groups:
+            for format_string in formats:
+                for i in range(20):
+                    day = date(rand.randint(1950, 2049), rand.randint(1, 12), rand.randint(1, 28))
+                    value = day.strftime(format_string)
+                    inputs.append(value)
+                    # Near misses, such as other days of the month or parts left out.
+                    inputs.append(value.replace('2', '3'))
+                    inputs.append(value[:-1])
+                    inputs.append(value[1:])
+        return inputs + ['29/02/2006', '31/04/06', '02/29', '13/2006', '2006 October', '']
+
+    def test_signature(self):
+        months = parsing.get_month_tables(parsing.current_locale())
+        self.assertEqual(parsing.signature('%d %B, %Y', months), ('D', 'A', ',', 'D'))
+        self.assertEqual(parsing.signature('%d/%m/%Y', months), ('D', '/', 'D', '/', 'D'))
+        self.assertEqual(parsing.signature('%Y%m', months), ('D',))
+        self.assertIsNone(parsing.signature('%m%d', months))
+        self.assertIsNone(parsing.signature('%A %d', months))
+
+    def test_same_results(self):
+        static = parsing.DateParser(self.groups)
+        adaptive = parsing.AdaptiveDateParser(self.groups, interval=10)
+        inputs = self.inputs()
+        expected = self.results(static, inputs)
+        # Mostly bare years and days with month names, which come last.
+        training = ['2006', '1999', '25 October 2006', '4 May 2010', 'Oct 25', '10/2006'] * 50
+        self.results(adaptive, training)
+        order = adaptive.order()
+        self.assertNotEqual(order, static.order())
+        self.assertEqual(order[0], ('year', '%Y'))
+        self.assertLess(order.index(('date', '%d %B %Y')), order.index(('date', '%d/%m/%Y')))
+        # Formats an input could match in either order keep their places.
+        self.assertLess(order.index(('month', '%b %Y')), order.index(('month', '%B %Y')))
+        self.assertEqual(adaptive.hits()[('year', '%Y')], 100)
+        self.assertEqual(self.results(adaptive, inputs), expected)
+
+    def test_unknown_signature(self):
+        # %x has no signature, so could match anything %d/%m/%y does.
+        groups = [('date', ['%d/%m/%y', '%x'])]
+        adaptive = parsing.AdaptiveDateParser(groups, interval=5)
+        self.results(adaptive, ['12/31/99'] * 5)
+        self.assertEqual(adaptive.order(), [('date', '%d/%m/%y'), ('date', '%x')])
+        self.assertEqual(self.results(adaptive, ['05/10/06']), self.results(parsing.DateParser(groups), ['05/10/06']))
+
+    @override_settings(DATE_EXTENSIONS_ADAPTIVE_INPUT_ORDER=True, DATE_EXTENSIONS_ADAPTIVE_INPUT_INTERVAL=5)
+    def test_form_fields(self):
+        field = ApproximateDateFormField()
+        self.assertIsInstance(field.parser(), parsing.AdaptiveDateParser)
+        for i in range(10):
+            self.assertEqual(field.clean('2006'), ApproximateDate(2006))
+        self.assertEqual(field.parser().order()[0], ('year', '%Y'))
+        pretty = PrettyDateField(future=True)
+        for i in range(10):
+            self.assertEqual(pretty.clean('25 October 2006'), date(2006, 10, 25))
+        order = pretty.parser().order()
+        self.assertLess(order.index(('date', '%d %B %Y')), order.index(('date', '%Y-%m-%d')))
+
+
+@override_settings(DATE_EXTENSIONS_PARSE_CACHE_SIZE=2)
+class ParseCacheTesting(SimpleTestCase):
+    def test_cache(self):
+        field = ApproximateDateFormField()
+        cache = ApproximateDateFormField.parse_cache
+        self.assertEqual(field.clean('Oct 2006'), ApproximateDate(2006, 10))
+        self.assertEqual(field.clean('Oct 2006'), ApproximateDate(2006, 10))
+        self.assertRaises(forms.ValidationError, field.clean, 'Octo 2006')
+        self.assertRaises(forms.ValidationError, field.clean, 'Octo 2006')
+        self.assertEqual(field.clean('2006'), ApproximateDate(2006))
+        self.assertEqual(cache.info(), (2, 3, 2, 2))
+
+        with override_settings(DATE_EXTENSIONS_YEAR_INPUT_FORMATS=()):
+            self.assertEqual(cache.info(), (0, 0, 2, 0))
+            self.assertRaises(forms.ValidationError, field.clean, '2006')
+        self.assertEqual(field.clean('2006'), ApproximateDate(2006))
+
+    def test_pretty_date_cache(self):
+        today = date.today().strftime('%d %B')
+        self.assertEqual(PrettyDateField(future=True).clean(today), date.today())
+        self.assertRaises(forms.ValidationError, PrettyDateField().clean, today)
+        self.assertEqual(PrettyDateField.parse_cache.info().currsize, 2)
+
+    def test_parsers(self):
+        parser = ApproximateDateFormField.parser()
+        self.assertIs(ApproximateDateFormField.parser(), parser)
+        self.assertIn(('day_month', '%d %B'), PrettyDateField(future=True).parser().order())
+        self.assertNotIn(('day_month', '%d %B'), PrettyDateField().parser().order())
+        with override_settings(DATE_EXTENSIONS_YEAR_INPUT_FORMATS=()):
+            self.assertNotIn(('year', '%Y'), ApproximateDateFormField.parser().order())
+        self.assertIs(ApproximateDateFormField.parser(), parser)
+
+
+class InstrumentationTesting(TestCase):
+    def setUp(self):
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+
+    def test_off_by_default(self):
+        self.assertFalse(instrumentation.enabled)
+        self.assertEqual(ApproximateDateField.__dict__['get_prep_value'].__name__, 'get_prep_value')
+        self.assertEqual(ApproximateDateFormField().clean('2006'), ApproximateDate(2006))
+        self.assertEqual(instrumentation.snapshot(), {})
+
+    def test_hot_paths(self):
+        calls = []
+        sink = instrumentation.CallbackSink(lambda *args: calls.append(args))
+        instrumentation.add_sink(sink)
+        self.addCleanup(instrumentation.remove_sink, sink)
+        with override_settings(DATE_EXTENSIONS_INSTRUMENTATION=True):
+            self.assertTrue(instrumentation.enabled)
+            field = ApproximateDateFormField()
+            self.assertEqual(field.clean('2006'), ApproximateDate(2006))
+            self.assertEqual(field.clean('25 October 2006'), ApproximateDate(2006, 10, 25))
+            self.assertRaises(forms.ValidationError, field.clean, 'Octo 2006')
+            ApproxDateModel.objects.create(start=ApproximateDate(2006, 10))
+            self.assertEqual(str(ApproxDateModel.objects.get().start), 'October 2006')
+        self.assertFalse(instrumentation.enabled)
+        field.clean('2006')
+
+        stats = instrumentation.snapshot()
+        self.assertEqual(stats['clean']['calls'], 3)
+        self.assertEqual(stats['clean']['failures'], 1)
+        self.assertAlmostEqual(stats['clean']['failure_rate'], 1 / 3.0)
+        self.assertEqual(sum(stats['clean']['histogram'].values()), 3)
+        # A failure tries every format, as does a bare year, which is last.
+        order = field.parser().order()
+        self.assertEqual(order.index(('year', '%Y')) + 1, len(order))
+        self.assertEqual(stats['parse']['attempts'], {
+            str(order.index(('date', '%d %B %Y')) + 1): 1,
+            str(len(order)): 2,
+        })
+        # start and can_be_null.
+        self.assertEqual(stats['from_db_value']['calls'], 2)
+        self.assertGreaterEqual(stats['get_prep_value']['calls'], 1)
+        self.assertEqual(stats['str']['calls'], 1)
+        self.assertEqual(len(calls), sum(figures['calls'] for figures in stats.values()))
+        self.assertEqual([call[::2] for call in calls[:2]], [('parse', False), ('clean', False)])
+        self.assertEqual(calls[0][3], len(order))
+
+    def test_statsd_sink(self):
+        class Client(object):
+            def __init__(self):
+                self.sent = []
+
+            def incr(self, name):
+                self.sent.append(('incr', name))
+
+            def timing(self, name, ms):
+                self.sent.append(('timing', name))
+
+        client = Client()
+        sink = instrumentation.StatsdSink(client, 'dates')
+        sink.record('parse', 0.001, True, 3)
+        self.assertEqual(client.sent, [
+            ('timing', 'dates.parse'), ('incr', 'dates.parse.failures'), ('incr', 'dates.parse.attempts.3'),
+        ])
+
+    def test_command(self):
+        path = os.path.join(tempfile.mkdtemp(), 'dates.txt')
+        self.addCleanup(shutil.rmtree, os.path.dirname(path))
+        with open(path, 'w') as f:
+            f.write('2006\nOct 2006\nnot a date\n')
+        out = StringIO()
+        call_command('approximate_date_stats', parse=path, reset=True, stdout=out)
+        stats = json.loads(out.getvalue())
+        self.assertEqual(stats['clean']['calls'], 3)
+        self.assertEqual(stats['clean']['failures'], 1)
+        self.assertEqual(sum(stats['parse']['attempts'].values()), 3)
+        self.assertFalse(instrumentation.enabled)
+        self.assertEqual(instrumentation.snapshot(), {})
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,9 +1,9 @@
 from datetime import date
 
-from django.utils import dateformat
 from django.forms import widgets
 
 from . import settings
+from .formatting import format_date
 
 
 class PrettyDateInput(widgets.Input):
@@ -13,5 +13,5 @@ class PrettyDateInput(widgets.Input):
         if value is None:
             value = ''
         elif isinstance(value, date):
-            value = dateformat.format(value, settings.OUTPUT_FORMAT_DAY_MONTH_YEAR)
+            value = format_date(value, settings.OUTPUT_FORMAT_DAY_MONTH_YEAR)
         return super(PrettyDateInput, self).render(name, value, attrs)
@@ -4,7 +4,11 @@ setup(
     name='django_date_extensions',
     version='3.1.2',
     url='https://github.com/dracos/django-date-extensions',
-    packages=['django_date_extensions'],
+    packages=[
+        'django_date_extensions',
+        'django_date_extensions.management',
+        'django_date_extensions.management.commands',
+    ],
     license='BSD',
     description=(
         "This code adds a few small extensions to Django's DateField,"